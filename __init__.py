@@ -1,11 +1,13 @@
 from .nodes.show_url import ShowUrl
 from .nodes.show_value import ShowValue
-from .nodes.image_node import LoadImageFromURL
-from .nodes.audio_url_loader import AudioURLLoader
-from .nodes.bunny_node import BunnyCDNStorageNodeVideoUpload
+from .nodes.image_node import LoadImageFromURL, LoadImageFromURLAsync, ImageInfoFromURL
+from .nodes.audio_url_loader import AudioURLLoader, AudioURLLoaderAsync
+from .nodes.bunny_node import BunnyCDNStorageNodeVideoUpload, BunnyCDNStorageNodeVideoUploadAsync, BunnySignURLs
 from .nodes.cleanup_node import CleanupFilenamesNode
 from .nodes.math_nodes import AddNode, SubtractNode, MultiplyNode, DivideNode, ClampNode, FloorNode, CeilNode
-from .nodes.flux_online_node import FLUXImageGeneratorOnline
+from .nodes.expression_node import ExpressionNode
+from .nodes.flux_online_node import FLUXImageGeneratorOnline, FLUXImageGeneratorOnlineAsync
+from .nodes.prefetch_node import PrefetchURLs
 
 NODE_CLASS_MAPPINGS = {
     "Audio URL Loader": AudioURLLoader,
@@ -19,9 +21,17 @@ NODE_CLASS_MAPPINGS = {
     "ClampNode": ClampNode,
     "FloorNode": FloorNode,
     "CeilNode": CeilNode,
+    "ExpressionNode": ExpressionNode,
     "ShowUrl": ShowUrl,
     "ShowValue": ShowValue,
     "FLUXImageGeneratorOnline": FLUXImageGeneratorOnline,
+    "Audio URL Loader Async": AudioURLLoaderAsync,
+    "Bunny CDN Video Upload Async": BunnyCDNStorageNodeVideoUploadAsync,
+    "LoadImageFromURLAsync": LoadImageFromURLAsync,
+    "FLUXImageGeneratorOnlineAsync": FLUXImageGeneratorOnlineAsync,
+    "ImageInfoFromURL": ImageInfoFromURL,
+    "PrefetchURLs": PrefetchURLs,
+    "BunnySignURLs": BunnySignURLs,
 }
 
 NODE_DISPLAY_NAME_MAPPINGS = {
@@ -36,7 +46,15 @@ NODE_DISPLAY_NAME_MAPPINGS = {
     ,"ClampNode": "🔒 Clamp"
     ,"FloorNode": "📉 Floor"
     ,"CeilNode": "📈 Ceil"
+    ,"ExpressionNode": "🧮 Expression"
     ,"ShowUrl": "Show URL"
     ,"ShowValue": "Show Value"
     ,"FLUXImageGeneratorOnline": "🌀 FLUX Online Image"
+    ,"Audio URL Loader Async": "🔊 Audio URL Loader (Async)"
+    ,"Bunny CDN Video Upload Async": "🐰 Bunny CDN Video Upload (Async)"
+    ,"LoadImageFromURLAsync": "Load Image From Url (Async)"
+    ,"FLUXImageGeneratorOnlineAsync": "🌀 FLUX Online Image (Async)"
+    ,"ImageInfoFromURL": "Image Info From Url"
+    ,"PrefetchURLs": "Prefetch URLs"
+    ,"BunnySignURLs": "🐰 Bunny Sign URLs"
 }
@@ -0,0 +1,51 @@
+import sys
+import types
+
+
+class _IOType(type):
+    # comfy's IO enum members are their own type names ("IMAGE", "STRING", "*", ...)
+    def __getattr__(cls, name):
+        return "*" if name == "ANY" else name
+
+
+class IO(metaclass=_IOType):
+    pass
+
+
+class NodeOutput(tuple):
+    def __new__(cls, *args, **kwargs):
+        return super().__new__(cls, args)
+
+
+def install_comfy_stubs():
+    """Register the few comfy modules the TFI nodes import when ComfyUI itself is absent.
+
+    Returns True if stubs were installed.
+    """
+    try:
+        import comfy.comfy_types.node_typing  # noqa: F401
+        import comfy_api.latest  # noqa: F401
+        return False
+    except ImportError:
+        pass
+
+    node_typing = types.ModuleType("comfy.comfy_types.node_typing")
+    node_typing.IO = IO
+    comfy_types = types.ModuleType("comfy.comfy_types")
+    comfy_types.node_typing = node_typing
+    comfy = types.ModuleType("comfy")
+    comfy.comfy_types = comfy_types
+
+    latest = types.ModuleType("comfy_api.latest")
+    latest.IO = types.SimpleNamespace(NodeOutput=NodeOutput)
+    comfy_api = types.ModuleType("comfy_api")
+    comfy_api.latest = latest
+
+    sys.modules.update({
+        "comfy": comfy,
+        "comfy.comfy_types": comfy_types,
+        "comfy.comfy_types.node_typing": node_typing,
+        "comfy_api": comfy_api,
+        "comfy_api.latest": latest,
+    })
+    return True
@@ -0,0 +1,338 @@
+"""
+Run TFI nodes headless, without a ComfyUI server.
+
+    python -m batch.run jobs.jsonl -o results.jsonl             # 4 threads
+    python -m batch.run jobs.jsonl -o results.jsonl -j 16 --executor process
+    python -m batch.run flux.csv --node FLUXImageGeneratorOnline --image-dir out/
+
+Each JSONL line is one job:
+
+    {"id": "a1", "node": "Bunny CDN Video Upload", "inputs": {"process_id": "a1", "cdn_path": "x", "filenames": [true, ["/tmp/a1.mp4"]]}}
+
+"node" is a key of NODE_CLASS_MAPPINGS. Required inputs that are left out
+take their widget default. An input written as {"$image": "path"} is loaded
+as an IMAGE tensor. A CSV file has one job per row: the "id" and "node"
+columns (or --node) pick the job, every other column is an input, and cells
+that parse as JSON (numbers, booleans, lists) are passed parsed.
+
+One result line is written per job as it finishes, with the outputs, the
+error (if any) and the time taken. IMAGE outputs are saved as PNG files when
+--image-dir is given and reported by path; other tensors are summarized.
+The exit status is 1 when any job failed.
+"""
+import argparse
+import asyncio
+import atexit
+import csv
+import importlib.util
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Per worker (process or thread pool): node mappings, node instances, event loops
+_worker = {}
+_worker_lock = threading.Lock()
+_local = threading.local()
+
+
+def load_node_mappings():
+    """Import the node package from REPO_ROOT (with comfy stubbed if absent); return NODE_CLASS_MAPPINGS."""
+    with _worker_lock:
+        if "mappings" not in _worker:
+            sys.path.insert(0, REPO_ROOT)
+            from batch.comfy_stubs import install_comfy_stubs
+            install_comfy_stubs()
+
+            # The package uses relative imports, so load it as a package under a fixed name
+            spec = importlib.util.spec_from_file_location(
+                "tfi_nodes", os.path.join(REPO_ROOT, "__init__.py"), submodule_search_locations=[REPO_ROOT]
+            )
+            package = importlib.util.module_from_spec(spec)
+            sys.modules[spec.name] = package
+            spec.loader.exec_module(package)
+            _worker["mappings"] = package.NODE_CLASS_MAPPINGS
+            _worker["instances"] = {}
+        return _worker["mappings"]
+
+
+def _node_instance(name):
+    mappings = load_node_mappings()
+    if name not in mappings:
+        raise KeyError(f"Unknown node {name!r}")
+    with _worker_lock:
+        instance = _worker["instances"].get(name)
+        if instance is None:
+            instance = _worker["instances"][name] = mappings[name]()
+    return instance
+
+
+def _event_loop():
+    # One loop per worker thread so async nodes keep reusing their pooled session
+    loop = getattr(_local, "loop", None)
+    if loop is None:
+        loop = _local.loop = asyncio.new_event_loop()
+        with _worker_lock:
+            if "loops" not in _worker:
+                _worker["loops"] = []
+                atexit.register(_close_loops)
+            _worker["loops"].append(loop)
+    return loop
+
+
+def _close_loops():
+    from tfi_nodes.nodes.async_http import close_session
+
+    for loop in _worker.pop("loops", []):
+        try:
+            loop.run_until_complete(close_session())
+        finally:
+            loop.close()
+
+
+def _load_image(path):
+    from PIL import Image, ImageOps
+    from tfi_nodes.nodes.util import pil_to_tensor
+
+    with Image.open(path) as img:
+        return pil_to_tensor(ImageOps.exif_transpose(img).convert("RGB"))
+
+
+def _resolve_inputs(node_cls, inputs):
+    kwargs = {}
+    for key, value in inputs.items():
+        if isinstance(value, dict) and set(value) == {"$image"}:
+            value = _load_image(value["$image"])
+        kwargs[key] = value
+
+    # Fill required widgets the way the ComfyUI frontend would
+    for key, spec in node_cls.INPUT_TYPES().get("required", {}).items():
+        if key in kwargs:
+            continue
+        kind = spec[0]
+        options = spec[1] if len(spec) > 1 else {}
+        if isinstance(kind, (list, tuple)) and kind:
+            kwargs[key] = options.get("default", kind[0])
+        elif "default" in options:
+            kwargs[key] = options["default"]
+        else:
+            raise ValueError(f"Missing required input {key!r}")
+    return kwargs
+
+
+def _serialize(value, job_id, image_dir, name):
+    import torch
+    from tfi_nodes.nodes.show_value import summarize
+    from tfi_nodes.nodes.util import tensor_to_pil
+
+    if image_dir and isinstance(value, torch.Tensor) and value.ndim == 4 and value.shape[-1] == 3:
+        os.makedirs(image_dir, exist_ok=True)
+        paths = []
+        for i in range(value.shape[0]):
+            path = os.path.join(image_dir, f"{job_id}_{name}_{i}.png")
+            tensor_to_pil(value[i]).save(path)
+            paths.append(path)
+        return {"type": "IMAGE", "files": paths}
+    return summarize(value)
+
+
+def run_job(job, image_dir=None):
+    """Run one job in this worker; return its JSON-serializable result line."""
+    job_id = str(job.get("id", job.get("index")))
+    result = {"index": job.get("index"), "id": job_id, "node": job.get("node")}
+    start = time.perf_counter()
+    try:
+        instance = _node_instance(job["node"])
+        node_cls = type(instance)
+        kwargs = _resolve_inputs(node_cls, job.get("inputs") or {})
+
+        output = getattr(instance, node_cls.FUNCTION)(**kwargs)
+        if asyncio.iscoroutine(output):
+            output = _event_loop().run_until_complete(output)
+
+        if isinstance(output, dict):
+            ui, output = output.get("ui"), output.get("result") or ()
+            if ui:
+                result["ui"] = _serialize(ui, job_id, None, "ui")
+        names = getattr(node_cls, "RETURN_NAMES", None) or getattr(node_cls, "RETURN_TYPES", ())
+        result["outputs"] = {
+            (names[i] if i < len(names) else str(i)): _serialize(v, job_id, image_dir, names[i] if i < len(names) else str(i))
+            for i, v in enumerate(output or ())
+        }
+        result["ok"] = True
+    except Exception as e:
+        result["ok"] = False
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["traceback"] = traceback.format_exc(limit=8)
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def _parse_cell(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def read_jobs(path, default_node=None):
+    """Yield job dicts from a JSONL or CSV file, numbered by "index"."""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            for index, row in enumerate(csv.DictReader(f)):
+                node = row.pop("node", None) or default_node
+                job_id = row.pop("id", None) or str(index)
+                inputs = {k: _parse_cell(v) for k, v in row.items() if k and v != ""}
+                yield {"index": index, "id": job_id, "node": node, "inputs": inputs}
+            return
+
+        index = 0
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                job = json.loads(line)
+            except ValueError as e:
+                raise SystemExit(f"{path}:{lineno}: invalid JSON: {e}")
+            job.setdefault("node", default_node)
+            job["index"] = index
+            index += 1
+            yield job
+
+
+class Progress:
+    """One-line progress on stderr: rewritten in place on a TTY, otherwise every few seconds."""
+
+    def __init__(self, total, quiet=False, interval_s=5.0):
+        self.total = total
+        self.quiet = quiet
+        self.interval_s = interval_s
+        self.done = 0
+        self.failed = 0
+        self.start = time.perf_counter()
+        self._last = 0.0
+        self._tty = sys.stderr.isatty()
+
+    def update(self, result):
+        self.done += 1
+        self.failed += 0 if result.get("ok") else 1
+        if not result.get("ok") and not self.quiet:
+            self._write(f"job {result['id']} failed: {result.get('error')}", final=True)
+        now = time.perf_counter()
+        if self.done == self.total or self._tty or now - self._last >= self.interval_s:
+            self._last = now
+            self.show()
+
+    def show(self, final=False):
+        if self.quiet:
+            return
+        elapsed = time.perf_counter() - self.start
+        rate = self.done / elapsed if elapsed else 0.0
+        eta = (self.total - self.done) / rate if rate else 0.0
+        self._write(
+            f"[{self.done}/{self.total}] failed={self.failed}  {rate:.2f} job/s  "
+            f"elapsed {elapsed:.0f}s  eta {eta:.0f}s",
+            final=final or not self._tty,
+        )
+
+    def _write(self, text, final=False):
+        if self._tty:
+            sys.stderr.write("\r\033[K" + text + ("\n" if final else ""))
+        else:
+            sys.stderr.write(text + "\n")
+        sys.stderr.flush()
+
+
+def _init_process_worker():
+    load_node_mappings()
+
+
+def run(jobs, out, executor="thread", workers=4, image_dir=None, quiet=False):
+    """Run jobs on a pool, writing result lines to out as they finish; return the results."""
+    if executor == "process":
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_process_worker)
+    else:
+        load_node_mappings()
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tfi-batch")
+
+    progress = Progress(len(jobs), quiet=quiet)
+    results = []
+    with pool:
+        # Keep a bounded window in flight so huge job files do not queue everything at once
+        pending = set()
+        queue = iter(jobs)
+        for job in queue:
+            pending.add(pool.submit(run_job, job, image_dir))
+            if len(pending) >= workers * 4:
+                break
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                results.append(result)
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+                progress.update(result)
+                job = next(queue, None)
+                if job is not None:
+                    pending.add(pool.submit(run_job, job, image_dir))
+    return results
+
+
+def summary(results, wall_s):
+    timings = [r["seconds"] for r in results]
+    ok = sum(1 for r in results if r.get("ok"))
+    lines = [f"{ok}/{len(results)} job(s) succeeded in {wall_s:.1f}s"]
+    if timings:
+        ordered = sorted(timings)
+        p95 = ordered[min(int(round(0.95 * (len(ordered) - 1))), len(ordered) - 1)]
+        lines.append(f"per job: p50 {statistics.median(timings):.3f}s  p95 {p95:.3f}s  max {ordered[-1]:.3f}s")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run TFI nodes headless from a JSONL or CSV job file")
+    parser.add_argument("jobs", nargs="?", help="JSONL (one job per line) or CSV job file")
+    parser.add_argument("-o", "--output", help="results JSONL (default: stdout)")
+    parser.add_argument("-j", "--workers", type=int, default=4)
+    parser.add_argument("--executor", choices=("thread", "process"), default="thread",
+                        help="threads share caches and connections; processes sidestep the GIL for CPU-bound nodes")
+    parser.add_argument("--node", help="node for jobs (or CSV rows) that do not name one")
+    parser.add_argument("--image-dir", help="save IMAGE outputs here as PNG files")
+    parser.add_argument("--list-nodes", action="store_true", help="print the available node names and exit")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no progress output")
+    args = parser.parse_args(argv)
+
+    if args.list_nodes:
+        for name, cls in load_node_mappings().items():
+            print(f"{name:<40} {cls.__name__}")
+        return 0
+    if not args.jobs:
+        parser.error("a job file is required")
+
+    jobs = list(read_jobs(args.jobs, args.node))
+    missing = [j["index"] for j in jobs if not j.get("node")]
+    if missing:
+        parser.error(f"{len(missing)} job(s) name no node (first: #{missing[0]}); use --node")
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    start = time.perf_counter()
+    try:
+        results = run(jobs, out, args.executor, max(args.workers, 1), args.image_dir, args.quiet)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    if not args.quiet:
+        print(summary(results, time.perf_counter() - start), file=sys.stderr)
+    return 0 if all(r.get("ok") for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
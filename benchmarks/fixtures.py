@@ -0,0 +1,77 @@
+import io
+import os
+import wave
+
+import numpy as np
+from PIL import Image
+
+
+def make_image_array(width=1024, height=1024, seed=0):
+    """Gradient plus noise: realistic compression ratios without real photos."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([x * 255 // max(width - 1, 1), y * 255 // max(height - 1, 1), (x + y) % 256], axis=-1)
+    noise = rng.integers(-24, 24, size=(height, width, 3))
+    return np.clip(base + noise, 0, 255).astype(np.uint8)
+
+
+def make_image(width=1024, height=1024, fmt="PNG", seed=0):
+    buf = io.BytesIO()
+    Image.fromarray(make_image_array(width, height, seed)).save(buf, format=fmt)
+    return buf.getvalue()
+
+
+def make_wav(seconds=30.0, sample_rate=44100, channels=2):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    tone = 0.3 * np.sin(2 * np.pi * 440.0 * t)
+    pcm = (np.repeat(tone[:, None], channels, axis=1) * 32767).astype("<i2")
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm.tobytes())
+    return buf.getvalue()
+
+
+def make_video(seconds=2.0, width=640, height=360, fps=24):
+    """MP4 (MPEG-4 part 2) encoded with PyAV; None when PyAV is not installed."""
+    try:
+        import av
+    except ImportError:
+        return None
+
+    buf = io.BytesIO()
+    with av.open(buf, mode="w", format="mp4") as container:
+        stream = container.add_stream("mpeg4", rate=fps)
+        stream.width = width
+        stream.height = height
+        stream.pix_fmt = "yuv420p"
+        for i in range(int(seconds * fps)):
+            frame = av.VideoFrame.from_ndarray(make_image_array(width, height, seed=i), format="rgb24")
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+    return buf.getvalue()
+
+
+def build_fixtures(directory):
+    """Generate every fixture into directory; return {name: path} for those that could be built."""
+    os.makedirs(directory, exist_ok=True)
+    built = {
+        "image.png": make_image(1024, 1024, "PNG"),
+        "image.jpg": make_image(1024, 1024, "JPEG"),
+        "sample.png": make_image(1024, 1024, "PNG", seed=1),
+        "audio.wav": make_wav(),
+        "video.mp4": make_video(),
+    }
+    paths = {}
+    for name, data in built.items():
+        if data is None:
+            continue
+        path = os.path.join(directory, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        paths[name] = path
+    return paths
@@ -0,0 +1,263 @@
+"""
+Offline benchmarks for the TFI nodes.
+
+    python -m benchmarks.run                      # run everything, compare with baseline.json
+    python -m benchmarks.run -s flux_single -n 20 # selected scenarios
+    python -m benchmarks.run --save-baseline      # record a new baseline
+    python -m benchmarks.run --latency-ms 50 --bandwidth-mbps 100 --fail-rate 0.05
+
+Bunny storage, the BFL API and plain file downloads are served by local
+stand-in servers (see servers.py); fixtures are generated on the fly. Each
+scenario runs in its own subprocess so its peak RSS is measured in
+isolation. The exit status is 1 when a scenario regresses against the
+baseline by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    idx = min(int(round(pct / 100.0 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[idx]
+
+
+def run_child(args):
+    """Run one scenario in this process and print its result as JSON."""
+    sys.path.insert(0, REPO_ROOT)
+    from batch.comfy_stubs import install_comfy_stubs
+    install_comfy_stubs()
+    from benchmarks.scenarios import SCENARIOS, missing_requirements
+
+    ctx = SimpleNamespace(
+        files_url=args.files_url,
+        fixtures=json.loads(args.fixtures),
+    )
+    setup, requires = SCENARIOS[args.child]
+    result = {"scenario": args.child}
+
+    reason = missing_requirements(requires, ctx)
+    if reason:
+        result["skipped"] = reason
+        print(json.dumps(result))
+        return
+
+    op = setup(ctx)
+    for _ in range(args.warmup):
+        op()
+
+    timings = []
+    total_bytes = 0
+    errors = 0
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        t0 = time.perf_counter()
+        try:
+            total_bytes += op() or 0
+        except Exception as e:
+            errors += 1
+            print(f"{args.child}: iteration failed: {e}", file=sys.stderr)
+        timings.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    result.update({
+        "iterations": args.iterations,
+        "errors": errors,
+        "p50_ms": statistics.median(timings) * 1000.0,
+        "p95_ms": _percentile(timings, 95) * 1000.0,
+        "mean_ms": statistics.fmean(timings) * 1000.0,
+        "ops_per_s": args.iterations / elapsed if elapsed else 0.0,
+        "mb_per_s": total_bytes / (1024.0 * 1024.0) / elapsed if elapsed and total_bytes else None,
+        "peak_rss_mb": _peak_rss_mb(),
+    })
+    print(json.dumps(result))
+
+
+def _child_env(bunny_url, bfl_url, state_dir):
+    env = dict(os.environ)
+    env.update({
+        "BUNNY_STORAGE_ENDPOINT": bunny_url,
+        "BUNNY_API_KEY": "bench",
+        "BUNNY_TOKEN_KEY": "bench",
+        "BUNNY_STORAGE_ZONE": "bench-zone",
+        "BFL_API_HOST": bfl_url,
+        "BFL_API_KEY": "bench",
+        # Keep every on-disk cache and lock out of the user's real directories
+        "TFI_AUDIO_CACHE_DIR": os.path.join(state_dir, "audio-cache"),
+        "TFI_FLUX_CACHE_DIR": os.path.join(state_dir, "flux-cache"),
+        "TFI_FLUX_SCHEDULER_DIR": os.path.join(state_dir, "flux-scheduler"),
+        "TFI_SCRATCH_DIR": os.path.join(state_dir, "scratch"),
+        "TFI_METRICS_FILE": "",
+        "TFI_METRICS_PORT": "",
+    })
+    # The submission rate limit would dominate FLUX timings unless asked for
+    env.setdefault("TFI_FLUX_RATE_PER_S", "0")
+    return env
+
+
+def run_all(args):
+    sys.path.insert(0, REPO_ROOT)
+    from benchmarks.fixtures import build_fixtures
+    from benchmarks.scenarios import SCENARIOS
+    from benchmarks.servers import BFLStandIn, BunnyStandIn, StandInServer
+
+    names = args.scenarios or list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        sys.exit(f"Unknown scenario(s): {', '.join(unknown)} (available: {', '.join(SCENARIOS)})")
+
+    server_opts = {
+        "latency_ms": args.latency_ms,
+        "bandwidth_mbps": args.bandwidth_mbps,
+        "fail_rate": args.fail_rate,
+        "fail_status": args.fail_status,
+        "retry_after_s": args.retry_after_s,
+    }
+
+    with tempfile.TemporaryDirectory(prefix="tfi-bench-") as state_dir:
+        fixtures = build_fixtures(os.path.join(state_dir, "fixtures"))
+        with StandInServer(**server_opts) as files, BunnyStandIn(**server_opts) as bunny, \
+                BFLStandIn(job_seconds=args.job_seconds, **server_opts) as bfl:
+            for name, path in fixtures.items():
+                with open(path, "rb") as f:
+                    files.files[name] = bfl.files[name] = f.read()
+
+            env = _child_env(bunny.base_url, bfl.base_url, state_dir)
+            results = {}
+            for name in names:
+                cmd = [
+                    sys.executable, "-m", "benchmarks.run", "--child", name,
+                    "--iterations", str(args.iterations), "--warmup", str(args.warmup),
+                    "--files-url", f"{files.base_url}/files", "--fixtures", json.dumps(fixtures),
+                ]
+                proc = subprocess.run(cmd, cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+                lines = proc.stdout.strip().splitlines()
+                if proc.returncode != 0 or not lines:
+                    results[name] = {"scenario": name, "failed": (proc.stderr or proc.stdout).strip()[-2000:]}
+                else:
+                    results[name] = json.loads(lines[-1])
+                _print_result(results[name])
+
+    return {
+        "config": dict(server_opts, job_seconds=args.job_seconds),
+        "iterations": args.iterations,
+        "machine": {"python": platform.python_version(), "platform": platform.platform()},
+        "results": results,
+    }
+
+
+def _print_result(r):
+    name = r["scenario"]
+    if "skipped" in r:
+        print(f"{name:<30} skipped: {r['skipped']}")
+    elif "failed" in r:
+        print(f"{name:<30} FAILED\n{r['failed']}")
+    else:
+        mbps = f"{r['mb_per_s']:8.1f} MB/s" if r.get("mb_per_s") else " " * 13
+        rss = f"{r['peak_rss_mb']:7.0f} MB" if r.get("peak_rss_mb") is not None else ""
+        errors = f"  errors={r['errors']}" if r.get("errors") else ""
+        print(
+            f"{name:<30} p50 {r['p50_ms']:9.1f} ms  p95 {r['p95_ms']:9.1f} ms  "
+            f"{r['ops_per_s']:8.2f} op/s {mbps}  rss {rss}{errors}"
+        )
+
+
+def compare(report, baseline, tolerance):
+    """Return a list of regression messages (empty when within tolerance)."""
+    if baseline.get("config") != report["config"]:
+        print("Note: baseline was recorded with a different stand-in configuration")
+
+    regressions = []
+    for name, current in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous or "p50_ms" not in previous:
+            continue
+        if "p50_ms" not in current:
+            if "failed" in current:
+                regressions.append(f"{name}: failed (baseline passed)")
+            continue
+        for key in ("p50_ms", "p95_ms", "peak_rss_mb"):
+            old, new = previous.get(key), current.get(key)
+            if old and new and new > old * (1.0 + tolerance):
+                regressions.append(f"{name}: {key} {old:.1f} -> {new:.1f} (+{(new / old - 1.0) * 100.0:.0f}%)")
+        if current.get("errors", 0) > previous.get("errors", 0):
+            regressions.append(f"{name}: errors {previous.get('errors', 0)} -> {current['errors']}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the TFI nodes")
+    parser.add_argument("-s", "--scenario", dest="scenarios", action="append", help="scenario to run (repeatable)")
+    parser.add_argument("-n", "--iterations", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added to every stand-in response")
+    parser.add_argument("--bandwidth-mbps", type=float, default=0.0, help="per-connection cap, 0 = unlimited")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="probability of an injected error response")
+    parser.add_argument("--fail-status", type=int, default=503)
+    parser.add_argument("--retry-after-s", type=int, default=0)
+    parser.add_argument("--job-seconds", type=float, default=0.5, help="time until a stand-in FLUX job is ready")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write the results to --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown / RSS growth ratio")
+    parser.add_argument("--json", help="also write the full report to this path")
+    # Internal: run a single scenario in this process
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--files-url", help=argparse.SUPPRESS)
+    parser.add_argument("--fixtures", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(args)
+        return 0
+
+    report = run_all(args)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(report, baseline, args.tolerance)
+    if regressions:
+        print("Regressions against baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+import asyncio
+import itertools
+import os
+import shutil
+
+
+# name -> (setup(ctx) -> op, reason it cannot run or None)
+SCENARIOS = {}
+
+
+def scenario(name, requires=()):
+    """Register setup(ctx) returning op(); op runs one iteration and returns bytes processed (or None)."""
+    def register(setup):
+        SCENARIOS[name] = (setup, requires)
+        return setup
+    return register
+
+
+def missing_requirements(requires, ctx):
+    for req in requires:
+        if req == "ffmpeg" and not shutil.which("ffmpeg"):
+            return "ffmpeg not found"
+        if req.startswith("fixture:") and req[len("fixture:"):] not in ctx.fixtures:
+            return f"fixture {req[len('fixture:'):]} unavailable"
+        if req.startswith("module:"):
+            try:
+                __import__(req[len("module:"):])
+            except ImportError as e:
+                return str(e)
+    return None
+
+
+def _event_loop_runner():
+    # One loop for all iterations so the pooled aiohttp session is reused
+    loop = asyncio.new_event_loop()
+    return loop.run_until_complete
+
+
+@scenario("util_pil_to_tensor", requires=("fixture:image.png",))
+def util_pil_to_tensor(ctx):
+    from PIL import Image
+    from nodes.util import pil_to_tensor
+
+    img = Image.open(ctx.fixtures["image.png"]).convert("RGB")
+    img.load()
+    nbytes = img.width * img.height * 3
+
+    def op():
+        pil_to_tensor(img)
+        return nbytes
+    return op
+
+
+@scenario("util_tensor_to_png", requires=("fixture:image.png",))
+def util_tensor_to_png(ctx):
+    from PIL import Image
+    from nodes.util import encode_image, pil_to_tensor, tensor_to_pil
+
+    tensor = pil_to_tensor(Image.open(ctx.fixtures["image.png"]).convert("RGB"))
+
+    def op():
+        data, _ = encode_image(tensor_to_pil(tensor), "png")
+        return len(data)
+    return op
+
+
+@scenario("load_image_url", requires=("fixture:image.png",))
+def load_image_url(ctx):
+    from nodes.image_node import LoadImageFromURL
+
+    node = LoadImageFromURL()
+    url = f"{ctx.files_url}/image.png"
+    size = os.path.getsize(ctx.fixtures["image.png"])
+
+    def op():
+        node.convert(url)
+        return size
+    return op
+
+
+@scenario("load_image_url_async", requires=("fixture:image.png", "module:aiohttp"))
+def load_image_url_async(ctx):
+    from nodes.image_node import LoadImageFromURLAsync
+
+    node = LoadImageFromURLAsync()
+    run = _event_loop_runner()
+    url = f"{ctx.files_url}/image.png"
+    size = os.path.getsize(ctx.fixtures["image.png"])
+
+    def op():
+        run(node.convert_async(url))
+        return size
+    return op
+
+
+@scenario("load_image_video_last_frame", requires=("fixture:video.mp4", "ffmpeg"))
+def load_image_video_last_frame(ctx):
+    from nodes.image_node import LoadImageFromURL
+
+    node = LoadImageFromURL()
+    url = f"{ctx.files_url}/video.mp4"
+    size = os.path.getsize(ctx.fixtures["video.mp4"])
+
+    def op():
+        node.convert(url)
+        return size
+    return op
+
+
+@scenario("audio_url_cold", requires=("fixture:audio.wav", "module:av"))
+def audio_url_cold(ctx):
+    from nodes.audio_url_loader import AudioURLLoader
+
+    node = AudioURLLoader()
+    counter = itertools.count()
+    size = os.path.getsize(ctx.fixtures["audio.wav"])
+
+    def op():
+        # A fresh query string per iteration bypasses the decoded-audio cache
+        node.load_audio(f"{ctx.files_url}/audio.wav?i={next(counter)}")
+        return size
+    return op
+
+
+@scenario("audio_url_revalidate", requires=("fixture:audio.wav", "module:av"))
+def audio_url_revalidate(ctx):
+    from nodes.audio_url_loader import AudioURLLoader
+
+    node = AudioURLLoader()
+    url = f"{ctx.files_url}/audio.wav"
+    node.load_audio(url)
+
+    def op():
+        node.load_audio(url)
+    return op
+
+
+def _upload_source(ctx):
+    return ctx.fixtures.get("video.mp4") or ctx.fixtures["image.png"]
+
+
+@scenario("bunny_upload", requires=("fixture:image.png",))
+def bunny_upload(ctx):
+    from nodes.bunny_node import BunnyCDNStorageNodeVideoUpload
+
+    node = BunnyCDNStorageNodeVideoUpload()
+    path = _upload_source(ctx)
+    size = os.path.getsize(path)
+    counter = itertools.count()
+
+    def op():
+        node.run(f"bench_{next(counter)}", "bench", filenames=[True, [path]])
+        return size
+    return op
+
+
+@scenario("bunny_upload_async", requires=("fixture:image.png", "module:aiohttp"))
+def bunny_upload_async(ctx):
+    from nodes.bunny_node import BunnyCDNStorageNodeVideoUploadAsync
+
+    node = BunnyCDNStorageNodeVideoUploadAsync()
+    run = _event_loop_runner()
+    path = _upload_source(ctx)
+    size = os.path.getsize(path)
+    counter = itertools.count()
+
+    def op():
+        run(node.run_async(f"bench_{next(counter)}", "bench", filenames=[True, [path]]))
+        return size
+    return op
+
+
+def _flux_inputs(**overrides):
+    inputs = {
+        "prompt": "benchmark",
+        "model": "flux-2-klein-9b",
+        "width": 1024,
+        "height": 1024,
+        "seed": 0,
+        "safety_tolerance": 2,
+        "output_format": "png",
+    }
+    inputs.update(overrides)
+    return inputs
+
+
+@scenario("flux_single", requires=("fixture:sample.png",))
+def flux_single(ctx):
+    from nodes.flux_online_node import FLUXImageGeneratorOnline
+
+    node = FLUXImageGeneratorOnline()
+    counter = itertools.count()
+
+    def op():
+        # Distinct seeds so single-flight never collapses iterations
+        node.generate(**_flux_inputs(seed=next(counter)))
+    return op
+
+
+@scenario("flux_batch4", requires=("fixture:sample.png",))
+def flux_batch4(ctx):
+    from nodes.flux_online_node import FLUXImageGeneratorOnline
+
+    node = FLUXImageGeneratorOnline()
+    counter = itertools.count()
+
+    def op():
+        base = next(counter) * 4
+        seeds = ",".join(str(base + i) for i in range(4))
+        node.generate(**_flux_inputs(batch_seeds=seeds, max_concurrency=4))
+    return op
+
+
+@scenario("flux_with_reference", requires=("fixture:sample.png", "fixture:image.png"))
+def flux_with_reference(ctx):
+    from PIL import Image
+    from nodes.flux_online_node import FLUXImageGeneratorOnline
+    from nodes.util import pil_to_tensor
+
+    node = FLUXImageGeneratorOnline()
+    ref = pil_to_tensor(Image.open(ctx.fixtures["image.png"]).convert("RGB"))
+    counter = itertools.count()
+
+    def op():
+        node.generate(**_flux_inputs(seed=next(counter), ref_1=ref))
+    return op
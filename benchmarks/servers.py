@@ -0,0 +1,279 @@
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+class StandInServer:
+    """
+    Local HTTP server for offline benchmarks.
+
+    - latency_ms is added before every response.
+    - bandwidth_mbps (megabits/s, 0 = unlimited) throttles request bodies and
+      responses per connection.
+    - fail_rate is the probability of answering fail_status instead (with
+      Retry-After: retry_after_s when that is set).
+    - Files put in self.files are served at GET /files/<name> with ETag
+      revalidation and single-range requests.
+    """
+
+    def __init__(self, latency_ms=0, bandwidth_mbps=0, fail_rate=0.0, fail_status=503, retry_after_s=0, seed=0):
+        self.latency_ms = latency_ms
+        self.bandwidth_mbps = bandwidth_mbps
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self.retry_after_s = retry_after_s
+        self.files = {}
+        self.stats = {"requests": 0, "failures": 0, "bytes_in": 0, "bytes_out": 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, host="127.0.0.1", port=0):
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name=type(self).__name__, daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _should_fail(self):
+        with self._lock:
+            return self.fail_rate > 0 and self._random.random() < self.fail_rate
+
+    def _throttle(self, nbytes):
+        if self.bandwidth_mbps > 0:
+            time.sleep(nbytes * 8 / (self.bandwidth_mbps * 1_000_000))
+
+    def read_body(self, handler):
+        remaining = int(handler.headers.get("Content-Length") or 0)
+        chunks = []
+        while remaining > 0:
+            chunk = handler.rfile.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            self._throttle(len(chunk))
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        body = b"".join(chunks)
+        self._count("bytes_in", len(body))
+        return body
+
+    def send(self, handler, status, body=b"", content_type="application/octet-stream", headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode("utf-8")
+            content_type = "application/json"
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            handler.send_header(key, value)
+        handler.end_headers()
+        if handler.command == "HEAD":
+            return
+        view = memoryview(body)
+        for start in range(0, len(view), CHUNK_SIZE):
+            chunk = view[start:start + CHUNK_SIZE]
+            self._throttle(len(chunk))
+            handler.wfile.write(chunk)
+        self._count("bytes_out", len(body))
+
+    def serve_file(self, handler, name):
+        data = self.files.get(name)
+        if data is None:
+            self.send(handler, 404, {"error": "not found"})
+            return
+        etag = f'"{len(data):x}-{hash(data) & 0xffffffff:x}"'
+        headers = {"ETag": etag, "Accept-Ranges": "bytes", "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}
+        if handler.headers.get("If-None-Match") == etag:
+            self.send(handler, 304, headers=headers)
+            return
+
+        byte_range = handler.headers.get("Range", "")
+        if byte_range.startswith("bytes=") and "," not in byte_range:
+            first, _, last = byte_range[len("bytes="):].partition("-")
+            try:
+                if first:
+                    start, end = int(first), int(last) if last else len(data) - 1
+                else:
+                    start, end = max(len(data) - int(last), 0), len(data) - 1
+            except ValueError:
+                start, end = 0, -1
+            end = min(end, len(data) - 1)
+            if start > end:
+                self.send(handler, 416, headers={"Content-Range": f"bytes */{len(data)}"})
+                return
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+            self.send(handler, 206, data[start:end + 1], self._content_type(name), headers)
+            return
+
+        self.send(handler, 200, data, self._content_type(name), headers)
+
+    def _content_type(self, name):
+        ext = name.rsplit(".", 1)[-1].lower()
+        return {
+            "png": "image/png",
+            "jpg": "image/jpeg",
+            "jpeg": "image/jpeg",
+            "webp": "image/webp",
+            "gif": "image/gif",
+            "mp4": "video/mp4",
+            "wav": "audio/wav",
+            "mp3": "audio/mpeg",
+        }.get(ext, "application/octet-stream")
+
+    def route(self, handler, method, path, query):
+        """Handle requests other than /files/*; subclasses override."""
+        self.send(handler, 404, {"error": "not found"})
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive so pooled clients behave as they would against the real services
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes; Nagle + delayed ACK would add ~40 ms
+            disable_nagle_algorithm = True
+
+            def _dispatch(self, method):
+                server._count("requests")
+                if server.latency_ms:
+                    time.sleep(server.latency_ms / 1000.0)
+                parsed = urlparse(self.path)
+                if server._should_fail():
+                    server._count("failures")
+                    if method in ("PUT", "POST"):
+                        server.read_body(self)
+                    headers = {"Retry-After": str(server.retry_after_s)} if server.retry_after_s else None
+                    server.send(self, server.fail_status, {"error": "injected failure"}, headers=headers)
+                    return
+                if parsed.path.startswith("/files/") and method in ("GET", "HEAD"):
+                    server.serve_file(self, parsed.path[len("/files/"):])
+                    return
+                server.route(self, method, parsed.path, parse_qs(parsed.query))
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_HEAD(self):
+                self._dispatch("HEAD")
+
+            def do_PUT(self):
+                self._dispatch("PUT")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def do_DELETE(self):
+                self._dispatch("DELETE")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+class BunnyStandIn(StandInServer):
+    """Bunny storage API: PUT / GET / DELETE /<zone>/<path> and directory listing on GET /<zone>/<dir>/."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.objects = {}
+
+    def route(self, handler, method, path, query):
+        if not handler.headers.get("AccessKey"):
+            if method == "PUT":
+                self.read_body(handler)
+            self.send(handler, 401, {"HttpCode": 401, "Message": "Unauthorized"})
+            return
+
+        key = path.lstrip("/")
+        if method == "PUT":
+            self.objects[key] = self.read_body(handler)
+            self.send(handler, 201, {"HttpCode": 201, "Message": "File uploaded."})
+        elif method in ("GET", "HEAD") and key.endswith("/"):
+            listing = [
+                {"ObjectName": name[len(key):], "Length": len(data), "IsDirectory": False}
+                for name, data in sorted(self.objects.items())
+                if name.startswith(key) and "/" not in name[len(key):]
+            ]
+            self.send(handler, 200, listing)
+        elif method in ("GET", "HEAD"):
+            if key not in self.objects:
+                self.send(handler, 404, {"HttpCode": 404, "Message": "Object Not Found"})
+            else:
+                self.send(handler, 200, self.objects[key])
+        elif method == "DELETE":
+            removed = self.objects.pop(key, None)
+            self.send(handler, 200 if removed is not None else 404, {"HttpCode": 200, "Message": "File deleted."})
+        else:
+            self.send(handler, 405, {"error": "method not allowed"})
+
+
+class BFLStandIn(StandInServer):
+    """
+    BFL API: POST /v1/<model> starts a job that turns Ready after job_seconds;
+    GET /v1/get_result?id=<id> reports its status. The sample is files["sample.png"].
+    """
+
+    def __init__(self, job_seconds=0.5, **kwargs):
+        super().__init__(**kwargs)
+        self.job_seconds = job_seconds
+        self.jobs = {}
+
+    def route(self, handler, method, path, query):
+        if not handler.headers.get("x-key"):
+            if method == "POST":
+                self.read_body(handler)
+            self.send(handler, 403, {"detail": "Not authenticated"})
+            return
+
+        if method == "POST" and path.startswith("/v1/"):
+            try:
+                json.loads(self.read_body(handler) or b"{}")
+            except ValueError:
+                self.send(handler, 422, {"detail": "invalid JSON"})
+                return
+            job_id = uuid.uuid4().hex
+            with self._lock:
+                self.jobs[job_id] = time.time() + self.job_seconds
+            self.send(handler, 200, {"id": job_id, "polling_url": f"{self.base_url}/v1/get_result?id={job_id}"})
+        elif method == "GET" and path == "/v1/get_result":
+            job_id = (query.get("id") or [""])[0]
+            with self._lock:
+                ready_at = self.jobs.get(job_id)
+            if ready_at is None:
+                self.send(handler, 404, {"detail": "Task not found"})
+            elif time.time() < ready_at:
+                self.send(handler, 200, {"id": job_id, "status": "Pending"})
+            else:
+                sample = f"{self.base_url}/files/sample.png"
+                self.send(handler, 200, {"id": job_id, "status": "Ready", "result": {"sample": sample}})
+        else:
+            self.send(handler, 404, {"detail": "Not Found"})
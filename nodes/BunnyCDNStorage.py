@@ -1,8 +1,8 @@
-import base64
-import hashlib
-import time
+import asyncio
+import os
 
-import requests
+from .http_transport import HTTP_TRANSPORT
+from .url_signing import get_signer
 
 
 class CDNConnector:
@@ -21,8 +21,13 @@ class CDNConnector:
         }
 
         self.token_key = token_key
+        self.signer = get_signer(token_key, self.base_cdn_url)
 
-        if storage_zone_region == 'de' or storage_zone_region == '':
+        # BUNNY_STORAGE_ENDPOINT overrides the regional storage host (e.g. a local stand-in)
+        endpoint = os.getenv('BUNNY_STORAGE_ENDPOINT', '').rstrip('/')
+        if endpoint:
+            self.base_url = endpoint + '/' + storage_zone + '/ai-talking-videos/'
+        elif storage_zone_region == 'de' or storage_zone_region == '':
             self.base_url = 'https://storage.bunnycdn.com/' + storage_zone + '/ai-talking-videos/'
         else:
             self.base_url = 'https://' + storage_zone_region + '.storage.bunnycdn.com/' + storage_zone + '/ai-talking-videos/'
@@ -37,7 +42,7 @@ class CDNConnector:
         if cdn_path[-1] != '/':
             request_url = request_url + '/'
 
-        response = requests.request('GET', request_url, headers=self.headers)
+        response = HTTP_TRANSPORT.request('GET', request_url, headers=self.headers)
         return response.json()
 
     def get_file(self, cdn_path, download_path=None):
@@ -55,7 +60,7 @@ class CDNConnector:
         filename = cdn_path.split('/')[-1]
 
         request_url = self.base_url + cdn_path
-        response = requests.request("GET", request_url, headers=self.headers)
+        response = HTTP_TRANSPORT.request("GET", request_url, headers=self.headers)
 
         if response.status_code == 404:
             raise ValueError('No such file exists')
@@ -77,12 +82,49 @@ class CDNConnector:
             file_path - locally stored file path,
             if none it will look for file in present working directory
         """
+        file_data = self._read_upload_data(file)
+        request_url, public_path = self._upload_target(cdn_path, file_name)
+
+        response = HTTP_TRANSPORT.request("PUT", request_url, data=file_data, headers=self.headers)
+
+        # try to safely parse response json when available
+        resp_json = None
+        try:
+            resp_json = response.json()
+        except Exception:
+            resp_json = {"status_code": response.status_code, "text": response.text}
+
+        return {
+            'filepath': public_path,
+            'response': resp_json
+        }
+
+    async def upload_file_async(self, cdn_path, file_name, file):
+        """
+            upload_file through the shared pooled aiohttp session \n
+            same arguments and return value as upload_file
+        """
+        from .async_http import put_bytes
+
+        file_data = await asyncio.to_thread(self._read_upload_data, file)
+        request_url, public_path = self._upload_target(cdn_path, file_name)
+
+        status, body = await put_bytes(request_url, file_data, headers=self.headers)
+        resp_json = body if isinstance(body, dict) else {"status_code": status, "text": body}
+
+        return {
+            'filepath': public_path,
+            'response': resp_json
+        }
+
+    def _read_upload_data(self, file):
         if type(file) is str:
             with open(file, 'rb') as f:
-                file_data = f.read()
-        else:
-            file_data = file.read()
+                return f.read()
+        return file.read()
 
+    def _upload_target(self, cdn_path, file_name):
+        """Return (storage request URL, public CDN URL) for an upload."""
         # handle empty/None cdn_path safely
         if not cdn_path:
             cdn_path = ''
@@ -97,20 +139,7 @@ class CDNConnector:
             # upload to root of ai-talking-videos folder
             request_url = self.base_url + file_name
             public_path = self.base_cdn_url + file_name
-
-        response = requests.request("PUT", request_url, data=file_data, headers=self.headers)
-
-        # try to safely parse response json when available
-        resp_json = None
-        try:
-            resp_json = response.json()
-        except Exception:
-            resp_json = {"status_code": response.status_code, "text": response.text}
-
-        return {
-            'filepath': public_path,
-            'response': resp_json
-        }
+        return request_url, public_path
 
     def remove(self, cdn_dir):
         """
@@ -119,17 +148,19 @@ class CDNConnector:
             for directory make sure that path ends with /
         """
         request_url = self.base_url + cdn_dir
-        response = requests.request('DELETE', request_url, headers=self.headers)
+        response = HTTP_TRANSPORT.request('DELETE', request_url, headers=self.headers)
         return response.json()
 
-    def generate_url(self, path: str):
-        expires = int(time.time()) + (3600 * 24)
-
-        hash_base = self.token_key + '/ai-talking-videos/' + path + str(expires)
-
-        md5_hash = hashlib.md5(hash_base.encode('utf-8')).digest()
-        token = base64.b64encode(md5_hash).decode('utf-8')
-        token = token.replace('+', '-').replace('/', '_').replace('=', '')
+    def generate_url(self, path: str, expires_in=None, token_path=None):
+        """
+            signed CDN URL for path (relative to base_cdn_url) \n
+            expires_in - seconds, default BUNNY_URL_EXPIRY_HOURS (24 h) \n
+            token_path - sign the directory instead, so one token covers every file in it
+        """
+        return self.signer.sign(path, expires_in, token_path)
 
-        url = f"{self.base_cdn_url}{path}?token={token}&expires={expires}"
-        return url
+    def generate_urls(self, paths, expires_in=None, token_path=None):
+        """
+            generate_url for a list of paths, all with the same expiry
+        """
+        return self.signer.sign_many(paths, expires_in, token_path)
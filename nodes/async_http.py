@@ -0,0 +1,125 @@
+import asyncio
+import ssl
+import time
+import weakref
+from urllib.parse import urlparse
+
+import aiohttp
+
+from .http_transport import HTTP_TRANSPORT, IDEMPOTENT_METHODS, RETRY_STATUSES, backoff_seconds
+from .util import throw_if_interrupted
+
+
+# One pooled session per event loop, shared by every async TFI node. Timeouts,
+# TLS verification, the per-host limit, retries and counters follow HTTP_TRANSPORT.
+MAX_CONNECTIONS = 64
+MAX_CONNECTIONS_PER_HOST = HTTP_TRANSPORT.max_per_host
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(
+    total=None, connect=HTTP_TRANSPORT.timeout[0], sock_read=HTTP_TRANSPORT.timeout[1]
+)
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+_sessions = weakref.WeakKeyDictionary()
+
+
+def get_session():
+    """Return the pooled aiohttp session for the running event loop."""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=MAX_CONNECTIONS,
+            limit_per_host=MAX_CONNECTIONS_PER_HOST,
+            keepalive_timeout=60,
+            ssl=_ssl_setting(),
+        )
+        session = aiohttp.ClientSession(connector=connector, timeout=DEFAULT_TIMEOUT)
+        _sessions[loop] = session
+    return session
+
+
+def _ssl_setting():
+    verify = HTTP_TRANSPORT.verify
+    if verify is True:
+        return True
+    if verify is False:
+        return False
+    return ssl.create_default_context(cafile=verify)
+
+
+async def _send(method, url, data=None, headers=None):
+    """Send a request on the pooled session, retrying idempotent ones like HTTP_TRANSPORT.
+
+    Returns the response; use it as an async context manager to release it.
+    """
+    retries = HTTP_TRANSPORT.retries if method in IDEMPOTENT_METHODS else 0
+    host = urlparse(url).netloc
+    attempt = 0
+    while True:
+        start = time.perf_counter()
+        try:
+            resp = await get_session().request(method, url, data=data, headers=headers)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            HTTP_TRANSPORT.count(host, "errors")
+            if attempt >= retries:
+                raise
+            resp = None
+        else:
+            HTTP_TRANSPORT.record(
+                host,
+                time.perf_counter() - start,
+                bytes_in=(resp.content_length or 0) if method != "HEAD" else 0,
+                bytes_out=len(data) if isinstance(data, (bytes, bytearray)) else 0,
+                error=resp.status >= 400,
+            )
+
+        if resp is not None and (resp.status not in RETRY_STATUSES or attempt >= retries):
+            return resp
+
+        delay = backoff_seconds(attempt, resp)
+        if resp is not None:
+            resp.release()
+        attempt += 1
+        HTTP_TRANSPORT.count(host, "retries")
+        await asyncio.sleep(delay)
+
+
+async def close_session():
+    """Close the running loop's pooled session (for callers that own their loops)."""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+async def fetch_bytes(url, headers=None):
+    """GET url and return the body as bytes."""
+    async with await _send("GET", url, headers=headers) as resp:
+        resp.raise_for_status()
+        return await resp.read()
+
+
+async def download_to_file(url, path, headers=None, allow_not_modified=False):
+    """Stream url into path; return (status, response headers).
+
+    With allow_not_modified a 304 is returned as-is and nothing is written.
+    """
+    async with await _send("GET", url, headers=headers) as resp:
+        if allow_not_modified and resp.status == 304:
+            return resp.status, resp.headers.copy()
+        resp.raise_for_status()
+        with open(path, "wb") as f:
+            async for chunk in resp.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                # Abort promptly when the prompt is cancelled
+                throw_if_interrupted()
+                f.write(chunk)
+        return resp.status, resp.headers.copy()
+
+
+async def put_bytes(url, data, headers=None):
+    """PUT data to url; return (status, parsed JSON or text)."""
+    async with await _send("PUT", url, data=data, headers=headers) as resp:
+        try:
+            body = await resp.json(content_type=None)
+        except Exception:
+            body = await resp.text()
+        return resp.status, body
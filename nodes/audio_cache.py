@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import torch
+
+
+class AudioCacheEntry:
+    def __init__(self, waveform, sample_rate, etag=None, last_modified=None, mapped=False):
+        self.waveform = waveform
+        self.sample_rate = int(sample_rate)
+        self.etag = etag
+        self.last_modified = last_modified
+        # Backed by a memory-mapped spill file rather than RAM
+        self.mapped = mapped
+        # Filled by PrefetchURLs; the next load may use it once without revalidating
+        self.prefetched = False
+
+    @property
+    def nbytes(self):
+        return self.waveform.element_size() * self.waveform.nelement()
+
+    @property
+    def resident_bytes(self):
+        """Bytes counted against the in-memory budget; mapped pages belong to the page cache."""
+        return 0 if self.mapped else self.nbytes
+
+    def copy(self):
+        """Entry with its own waveform, so callers may modify it in place."""
+        return AudioCacheEntry(self.waveform.clone(), self.sample_rate, self.etag, self.last_modified)
+
+    def validators(self):
+        """Conditional request headers used to revalidate a URL entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class DecodedAudioCache:
+    """
+    Process-wide LRU of decoded waveforms.
+
+    Entries live in memory up to max_bytes. When spill_dir is set, entries
+    evicted from memory are written there as .npy files and memory-mapped
+    back on the next lookup instead of being downloaded and decoded again;
+    mapped entries do not count against max_bytes. get() and put() return
+    copies, so the cached waveforms never reach downstream nodes.
+    """
+
+    def __init__(self, max_bytes, spill_dir=None, max_disk_bytes=0):
+        self.max_bytes = max(int(max_bytes), 0)
+        self.spill_dir = spill_dir or None
+        self.max_disk_bytes = max(int(max_disk_bytes), 0)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(source, *decode_params):
+        h = hashlib.sha256()
+        h.update(str(source).encode("utf-8"))
+        for p in decode_params:
+            h.update(b"\0")
+            h.update(str(p).encode("utf-8"))
+        return h.hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None:
+            entry = self._load_spilled(key)
+            if entry is None:
+                return None
+            self._insert(key, entry, spill=False)
+        return entry.copy()
+
+    def put(self, key, waveform, sample_rate, etag=None, last_modified=None):
+        entry = AudioCacheEntry(waveform.contiguous(), sample_rate, etag, last_modified)
+        self._insert(key, entry, spill=True)
+        return entry.copy()
+
+    def touch(self, key, etag=None, last_modified=None):
+        """Refresh validators after a 304 so the next revalidation stays conditional."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            if etag:
+                entry.etag = etag
+            if last_modified:
+                entry.last_modified = last_modified
+
+    def mark_prefetched(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.prefetched = True
+
+    def claim_prefetched(self, key):
+        """Clear the prefetch mark of key; True if it was set."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not entry.prefetched:
+                return False
+            entry.prefetched = False
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _insert(self, key, entry, spill):
+        evicted = []
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.resident_bytes
+
+            if entry.resident_bytes > self.max_bytes:
+                # Too large to keep resident; go straight to disk if allowed.
+                evicted.append((key, entry))
+            else:
+                self._entries[key] = entry
+                self._bytes += entry.resident_bytes
+                while self._bytes > self.max_bytes and self._entries:
+                    old_key, old_entry = self._entries.popitem(last=False)
+                    self._bytes -= old_entry.resident_bytes
+                    evicted.append((old_key, old_entry))
+
+        if spill:
+            # A freshly decoded entry must replace whatever was on disk for the key.
+            self._remove_spilled(key)
+        for old_key, old_entry in evicted:
+            self._spill(old_key, old_entry)
+
+    def _paths(self, key):
+        base = os.path.join(self.spill_dir, key)
+        return base + ".npy", base + ".json"
+
+    def _spill(self, key, entry):
+        if not self.spill_dir:
+            return
+        npy_path, meta_path = self._paths(key)
+        if os.path.exists(npy_path) and os.path.exists(meta_path):
+            return
+        try:
+            tmp_path = npy_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, entry.waveform.cpu().numpy())
+            os.replace(tmp_path, npy_path)
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "sample_rate": entry.sample_rate,
+                        "etag": entry.etag,
+                        "last_modified": entry.last_modified,
+                    },
+                    f,
+                )
+        except Exception as e:
+            print(f"DecodedAudioCache: failed to spill {key}: {e}")
+            self._remove_spilled(key)
+            return
+        self._enforce_disk_budget()
+
+    def _load_spilled(self, key):
+        if not self.spill_dir:
+            return None
+        npy_path, meta_path = self._paths(key)
+        if not (os.path.exists(npy_path) and os.path.exists(meta_path)):
+            return None
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            # Copy-on-write mapping: pages are read lazily and the array stays writable for torch.
+            arr = np.load(npy_path, mmap_mode="c")
+            os.utime(npy_path)
+        except Exception as e:
+            print(f"DecodedAudioCache: failed to load spilled {key}: {e}")
+            self._remove_spilled(key)
+            return None
+        return AudioCacheEntry(
+            torch.from_numpy(arr),
+            meta["sample_rate"],
+            meta.get("etag"),
+            meta.get("last_modified"),
+            mapped=True,
+        )
+
+    def _remove_spilled(self, key):
+        if not self.spill_dir:
+            return
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _enforce_disk_budget(self):
+        if not self.max_disk_bytes:
+            return
+        files = []
+        total = 0
+        for entry in os.scandir(self.spill_dir):
+            if not entry.name.endswith(".npy"):
+                continue
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, entry.name[:-4]))
+            total += st.st_size
+        files.sort()
+        for _, size, key in files:
+            if total <= self.max_disk_bytes:
+                break
+            self._remove_spilled(key)
+            total -= size
+
+
+AUDIO_CACHE = DecodedAudioCache(
+    max_bytes=int(float(os.getenv("TFI_AUDIO_CACHE_MB", "512")) * 1024 * 1024),
+    spill_dir=os.getenv("TFI_AUDIO_CACHE_DIR", ""),
+    max_disk_bytes=int(float(os.getenv("TFI_AUDIO_CACHE_DISK_MB", "0")) * 1024 * 1024),
+)
@@ -1,13 +1,26 @@
+import asyncio
 import os
-import tempfile
+import time
 import base64
+import hashlib
 from comfy_api.latest import IO
-import requests
 from urllib.parse import urlparse
 import torch
 import av
 
+from .async_http import download_to_file
+from . import ranged_download
+from .audio_cache import AUDIO_CACHE
+from .download_cache import is_prefetching, wait_for_prefetch
+from .metrics import METRICS
+from .scratch import SCRATCH
+from .util import is_interrupt
+
 AUDIO_EXTENSIONS = {'.mp3', '.wav', '.flac', '.m4a', '.aac', '.ogg', '.wma'}
+# Part of the cache key; bump when _load changes what it produces.
+DECODE_PARAMS = "f32-planar"
+# Metrics label shared by the sync and async loaders
+METRICS_NODE = "AudioURLLoader"
 
 class AudioURLLoader:
     @classmethod
@@ -94,47 +107,176 @@ class AudioURLLoader:
                 else:
                     b64data = data
 
-                audio_bytes = base64.b64decode(b64data)
+                cache_key = AUDIO_CACHE.make_key(
+                    "base64:" + hashlib.sha256(b64data.encode("utf-8")).hexdigest(),
+                    extension,
+                    DECODE_PARAMS,
+                )
+                entry = AUDIO_CACHE.get(cache_key)
+                if entry is not None:
+                    METRICS.inc("cache_hits", METRICS_NODE)
+                else:
+                    METRICS.inc("cache_misses", METRICS_NODE)
+                    audio_bytes = base64.b64decode(b64data)
 
-                with tempfile.NamedTemporaryFile(suffix=extension, delete=False) as temp_file:
-                    temp_path = temp_file.name
-                    temp_file.write(audio_bytes)
+                    with SCRATCH.temp(extension, expected_bytes=len(audio_bytes)) as temp_path:
+                        with open(temp_path, "wb") as temp_file:
+                            temp_file.write(audio_bytes)
+                        with METRICS.timer(METRICS_NODE, "decode"):
+                            waveform, sample_rate = self._load(temp_path)
+                    entry = AUDIO_CACHE.put(cache_key, waveform, sample_rate)
             else:
-                # Check if URL is valid
-                parsed_url = urlparse(url)
-                if not parsed_url.scheme or not parsed_url.netloc:
-                    raise ValueError(f"Invalid URL: {url.strip()[:100]}")
-
-                # Download audio file
-                response = requests.get(url, stream=True)
-                response.raise_for_status()
-
-                # Create temporary file to save the audio
-                extension = os.path.splitext(parsed_url.path)[1].lower()
-                if extension not in AUDIO_EXTENSIONS:
-                    extension = '.mp3'  # Default extension if not recognized
-
-                with tempfile.NamedTemporaryFile(suffix=extension, delete=False) as temp_file:
-                    temp_path = temp_file.name
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            temp_file.write(chunk)
-
-            # Load audio
+                cache_key, extension, entry, headers = self._url_cache_lookup(url)
+                if headers is None:
+                    METRICS.inc("cache_hits", METRICS_NODE)
+                    return self._outputs(entry)
+
+                # Download audio file, revalidating any cached decode with ETag / Last-Modified.
+                # Large files come down as parallel ranges when the server allows it.
+                download_start = time.perf_counter()
+                remote = ranged_download.probe(url, headers=headers)
+
+                if entry is not None and remote.not_modified:
+                    METRICS.observe(METRICS_NODE, "download", time.perf_counter() - download_start)
+                    METRICS.inc("cache_hits", METRICS_NODE)
+                    AUDIO_CACHE.touch(
+                        cache_key,
+                        etag=remote.headers.get("ETag"),
+                        last_modified=remote.headers.get("Last-Modified"),
+                    )
+                else:
+                    # Scratch file for the download; removed even if decoding fails
+                    with SCRATCH.temp(extension, expected_bytes=remote.size) as temp_path:
+                        status, response_headers = ranged_download.download(
+                            url, temp_path, headers=headers, remote=remote
+                        )
+                        METRICS.observe(METRICS_NODE, "download", time.perf_counter() - download_start)
+
+                        if entry is not None and status == 304:
+                            # HEAD was not conclusive but the GET revalidated the cached decode
+                            METRICS.inc("cache_hits", METRICS_NODE)
+                            AUDIO_CACHE.touch(
+                                cache_key,
+                                etag=response_headers.get("ETag"),
+                                last_modified=response_headers.get("Last-Modified"),
+                            )
+                        else:
+                            METRICS.inc("cache_misses", METRICS_NODE)
+                            entry = self._decode_download(cache_key, temp_path, response_headers)
+
+                if is_prefetching(url):
+                    AUDIO_CACHE.mark_prefetched(cache_key)
+
+            return self._outputs(entry)
+
+        except Exception as e:
+            # A cancelled prompt must reach the executor instead of yielding empty audio
+            if is_interrupt(e):
+                raise
+            return self._error_outputs(e)
+
+    def _url_cache_lookup(self, url):
+        """Validate url and return (cache_key, extension, cached entry or None, request headers).
+
+        headers is None when the entry was just filled by PrefetchURLs and
+        may be used as is.
+        """
+        # Check if URL is valid
+        parsed_url = urlparse(url)
+        if not parsed_url.scheme or not parsed_url.netloc:
+            raise ValueError(f"Invalid URL: {url.strip()[:100]}")
+
+        extension = os.path.splitext(parsed_url.path)[1].lower()
+        if extension not in AUDIO_EXTENSIONS:
+            extension = '.mp3'  # Default extension if not recognized
+
+        # A running PrefetchURLs download of this URL is about to fill the cache
+        wait_for_prefetch(url)
+
+        cache_key = AUDIO_CACHE.make_key("url:" + url, extension, DECODE_PARAMS)
+        entry = AUDIO_CACHE.get(cache_key)
+        if entry is not None and not is_prefetching(url) and AUDIO_CACHE.claim_prefetched(cache_key):
+            # Decoded moments ago for this load; trusted once, even without validators
+            return cache_key, extension, entry, None
+
+        headers = entry.validators() if entry is not None else {}
+        if entry is not None and not headers:
+            # Nothing to revalidate against; the cached decode cannot be trusted.
+            entry = None
+        return cache_key, extension, entry, headers
+
+    def _decode_download(self, cache_key, temp_path, response_headers):
+        METRICS.inc("bytes_in", METRICS_NODE, os.path.getsize(temp_path))
+
+        # Load audio
+        with METRICS.timer(METRICS_NODE, "decode"):
             waveform, sample_rate = self._load(temp_path)
 
-            # Cleanup temporary file
-            os.unlink(temp_path)
+        return AUDIO_CACHE.put(
+            cache_key,
+            waveform,
+            sample_rate,
+            etag=response_headers.get("ETag"),
+            last_modified=response_headers.get("Last-Modified"),
+        )
+
+    def _outputs(self, entry):
+        waveform, sample_rate = entry.waveform, entry.sample_rate
+
+        audio = {"waveform": waveform.unsqueeze(0), "sample_rate": sample_rate}
+        # duration in seconds = samples / sample_rate
+        duration_seconds = float(waveform.shape[-1]) / float(sample_rate)
+        return IO.NodeOutput(audio, duration_seconds)
+
+    def _error_outputs(self, e):
+        print(f"Error loading audio from URL: {str(e)}")
+        # Return empty audio and zero duration in case of error
+        waveform = torch.zeros((1, 2, 1))
+        sample_rate = 44100
+        audio = {"waveform": waveform, "sample_rate": sample_rate}
+        return IO.NodeOutput(audio, 0.0)
+
+
+class AudioURLLoaderAsync(AudioURLLoader):
+    """
+    AudioURLLoader as a native async node: URL downloads go through the shared
+    pooled aiohttp session and decoding runs in a worker thread.
+    """
+
+    FUNCTION = "load_audio_async"
+
+    async def load_audio_async(self, url, isBase64=False):
+        if isBase64:
+            # Nothing to download; just keep the decode off the event loop
+            return await asyncio.to_thread(self.load_audio, url, isBase64)
+
+        try:
+            # The lookup may wait for a running prefetch or map a spilled entry; keep it off the loop
+            cache_key, extension, entry, headers = await asyncio.to_thread(self._url_cache_lookup, url)
+            if headers is None:
+                METRICS.inc("cache_hits", METRICS_NODE)
+                return self._outputs(entry)
+
+            with SCRATCH.temp(extension) as temp_path:
+                with METRICS.timer(METRICS_NODE, "download"):
+                    status, response_headers = await download_to_file(
+                        url, temp_path, headers=headers, allow_not_modified=entry is not None
+                    )
+
+                if entry is not None and status == 304:
+                    METRICS.inc("cache_hits", METRICS_NODE)
+                    AUDIO_CACHE.touch(
+                        cache_key,
+                        etag=response_headers.get("ETag"),
+                        last_modified=response_headers.get("Last-Modified"),
+                    )
+                else:
+                    METRICS.inc("cache_misses", METRICS_NODE)
+                    entry = await asyncio.to_thread(self._decode_download, cache_key, temp_path, response_headers)
 
-            audio = {"waveform": waveform.unsqueeze(0), "sample_rate": sample_rate}
-            # duration in seconds = samples / sample_rate
-            duration_seconds = float(waveform.shape[-1]) / float(sample_rate)
-            return IO.NodeOutput(audio, duration_seconds)
+            return self._outputs(entry)
 
         except Exception as e:
-            print(f"Error loading audio from URL: {str(e)}")
-            # Return empty audio and zero duration in case of error
-            waveform = torch.zeros((1, 2, 1))
-            sample_rate = 44100
-            audio = {"waveform": waveform, "sample_rate": sample_rate}
-            return IO.NodeOutput(audio, 0.0)
+            if is_interrupt(e):
+                raise
+            return self._error_outputs(e)
@@ -1,12 +1,24 @@
+import asyncio
 import datetime
+import io
+import json
 import os
 import pathlib
-import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 from .BunnyCDNStorage import CDNConnector
+from .metrics import METRICS
+from .renditions import parse_renditions, render_all, rendition_source
+from .scratch import SCRATCH
+from .url_signing import expires_at
 from .util import tensor_to_pil
 from comfy.comfy_types.node_typing import IO
 
+# Metrics label shared by the sync and async upload nodes
+METRICS_NODE = "BunnyCDNStorageNodeVideoUpload"
+# Concurrent PUTs when an upload comes with renditions
+UPLOAD_CONCURRENCY = max(int(os.getenv("TFI_UPLOAD_CONCURRENCY", "4")), 1)
+
 class BunnyCDNStorageNodeVideoUpload:
     @classmethod
     def INPUT_TYPES(cls):
@@ -21,13 +33,16 @@ class BunnyCDNStorageNodeVideoUpload:
                 "image": (IO.IMAGE, {}),
                 "video": (IO.VIDEO, {}),
                 "index": ("INT", {"default": 0, "min": 0, "max": 1000, "step": 1}),
+                # name:size:format[:quality], comma separated; size is the longest side,
+                # a height ("720p") or 0 for full size, e.g. "thumb:256:webp, poster:720p:jpg"
+                "renditions": ("STRING", {"default": "", "multiline": False}),
             },
             "hidden": {"prompt": "PROMPT", "extra_pnginfo": "EXTRA_PNGINFO"},
         }
 
-    # Return the uploaded URL
-    RETURN_TYPES = ("STRING", "ANY")
-    RETURN_NAMES = ("url", "filenames")
+    # Return the uploaded URL (and a JSON map of rendition name -> signed URL)
+    RETURN_TYPES = ("STRING", "ANY", "STRING")
+    RETURN_NAMES = ("url", "filenames", "renditions")
     CATEGORY = "TFI/Video"
     FUNCTION = "run"
     
@@ -175,10 +190,13 @@ class BunnyCDNStorageNodeVideoUpload:
         except Exception as exc:
             raise FileNotFoundError("Unable to convert IMAGE input into a file for upload.") from exc
 
-        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-        tmp.close()
-        pil_image.save(tmp.name, format="PNG")
-        return pathlib.Path(tmp.name)
+        tmp_path = SCRATCH.mkstemp(".png")
+        try:
+            pil_image.save(tmp_path, format="PNG")
+        except BaseException:
+            SCRATCH.release(tmp_path)
+            raise
+        return pathlib.Path(tmp_path)
 
     def _looks_like_video_input(self, obj):
         return (
@@ -207,17 +225,23 @@ class BunnyCDNStorageNodeVideoUpload:
                 source.seek(0)
             except Exception:
                 pass
-            tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".mp4")
-            tmp.close()
-            with open(tmp.name, "wb") as handle:
-                handle.write(source.read())
-            return pathlib.Path(tmp.name), True
+            tmp_path = SCRATCH.mkstemp(".mp4")
+            try:
+                with open(tmp_path, "wb") as handle:
+                    handle.write(source.read())
+            except BaseException:
+                SCRATCH.release(tmp_path)
+                raise
+            return pathlib.Path(tmp_path), True
 
         if hasattr(video_obj, "save_to") and callable(getattr(video_obj, "save_to")):
-            tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".mp4")
-            tmp.close()
-            video_obj.save_to(tmp.name)
-            return pathlib.Path(tmp.name), True
+            tmp_path = SCRATCH.mkstemp(".mp4")
+            try:
+                video_obj.save_to(tmp_path)
+            except BaseException:
+                SCRATCH.release(tmp_path)
+                raise
+            return pathlib.Path(tmp_path), True
 
         raise FileNotFoundError("Unable to resolve a local path from the provided VIDEO input.")
 
@@ -225,89 +249,264 @@ class BunnyCDNStorageNodeVideoUpload:
     def IS_CHANGED(cls, **kwargs):
         return float("nan")
     
-    def run(
-        self,
-        process_id,
-        cdn_path,
-        filenames=None,
-        image=None,
-        video=None,
-        index=0,
-        prompt=None,
-        extra_pnginfo=None,
-    ):
+    def _connector(self):
         # instantiate connector using env vars only
         api_key = os.getenv("BUNNY_API_KEY", "")
         token_key = os.getenv("BUNNY_TOKEN_KEY", "")
-        connector = CDNConnector(
+        return CDNConnector(
             api_key,
             os.getenv("BUNNY_STORAGE_ZONE", "product-gennie"),
             os.getenv("BUNNY_STORAGE_REGION", "sg"),
             token_key,
         )
 
-        passthrough = None
-        candidate = None
-
+    def _select_input(self, filenames, image, video, index):
+        """Return (passthrough, candidate, success) for the first provided input."""
         if filenames is not None:
-            passthrough = filenames
             success, candidate = self._extract_sequence_entry(filenames, index)
-            if not success:
-                return ("", passthrough)
-        elif video is not None:
-            passthrough = video
+            return filenames, candidate, success
+        if video is not None:
             success, candidate = self._extract_sequence_entry(video, index)
-            if not success:
-                return ("", passthrough)
-        elif image is not None:
-            passthrough = image
-            candidate = image
-        else:
-            raise ValueError("No filenames, video, or image input provided for upload.")
+            return video, candidate, success
+        if image is not None:
+            return image, image, True
+        raise ValueError("No filenames, video, or image input provided for upload.")
+
+    def _resolve_upload_path(self, candidate, image, cleanup_paths):
+        """Resolve (or materialize) the local file to upload; temp files go to cleanup_paths."""
+        if self._looks_like_video_input(candidate):
+            p, should_cleanup = self._materialize_video_input(candidate)
+            if should_cleanup:
+                cleanup_paths.append(p)
+            return p
 
-        cleanup_paths = []
         try:
-            if self._looks_like_video_input(candidate):
+            return self.resolve_path(candidate)
+        except FileNotFoundError:
+            if image is not None:
+                temp_image = self._materialize_image(image)
+                cleanup_paths.append(temp_image)
+                return temp_image
+            elif self._looks_like_video_input(candidate):
                 p, should_cleanup = self._materialize_video_input(candidate)
                 if should_cleanup:
                     cleanup_paths.append(p)
-            else:
-                try:
-                    p = self.resolve_path(candidate)
-                except FileNotFoundError:
-                    if image is not None:
-                        temp_image = self._materialize_image(image)
-                        cleanup_paths.append(temp_image)
-                        p = temp_image
-                    elif self._looks_like_video_input(candidate):
-                        p, should_cleanup = self._materialize_video_input(candidate)
-                        if should_cleanup:
-                            cleanup_paths.append(p)
-                    else:
-                        raise
-
-            # Determine cdn_path and file_name from output_url
-            # Prefer a non-empty process_id; otherwise use a timestamp.
-            base_name = process_id.strip() if isinstance(process_id, str) else ""
-            if not base_name:
-                base_name = datetime.datetime.now().strftime("upload_%Y%m%d_%H%M%S")
-            file_name = f"{base_name}{p.suffix}"
-
-            # upload using CDNConnector (upload_file accepts a file path or file-like)
-            result = connector.upload_file(cdn_path, file_name, str(p))
-            # Prefer a signed/tokenized URL generated from the known path,
-            # fall back to whatever upload_file returned in 'filepath'.
-            print(f"BunnyCDNStorageNodeVideoUpload: Upload result: {result}")
+                return p
+            raise
+
+    def _upload_file_name(self, process_id, p):
+        # Determine cdn_path and file_name from output_url
+        # Prefer a non-empty process_id; otherwise use a timestamp.
+        base_name = process_id.strip() if isinstance(process_id, str) else ""
+        if not base_name:
+            base_name = datetime.datetime.now().strftime("upload_%Y%m%d_%H%M%S")
+        return f"{base_name}{p.suffix}"
+
+    def _uploaded_url(self, connector, cdn_path, file_name, result):
+        # Prefer a signed/tokenized URL generated from the known path,
+        # fall back to whatever upload_file returned in 'filepath'.
+        print(f"BunnyCDNStorageNodeVideoUpload: Upload result: {result}")
+        try:
+            relative_path = f"{cdn_path}/{file_name}" if cdn_path else file_name
+            return connector.generate_url(relative_path)
+        except Exception:
+            return result.get("filepath", "") if isinstance(result, dict) else ""
+
+    def _render(self, renditions, p, image, file_name):
+        """Encode the renditions of the upload; return {name: (file name, data)}.
+
+        They are made from the IMAGE tensor when that is what is uploaded, else
+        from the file (the first frame, for a video). Failures are printed and
+        yield no renditions, so the original upload still succeeds.
+        """
+        try:
+            source = rendition_source(p, image)
+            if source is None:
+                print(f"BunnyCDNStorageNodeVideoUpload: no renditions for {p.suffix or 'this'} files")
+                return {}
+            with METRICS.timer(METRICS_NODE, "renditions"):
+                encoded = render_all(source, renditions)
+        except Exception as e:
+            print(f"BunnyCDNStorageNodeVideoUpload: failed to create renditions: {e}")
+            return {}
+
+        stem = pathlib.Path(file_name).stem
+        by_name = {r.name: r for r in renditions}
+        return {
+            name: (f"{stem}_{name}.{by_name[name].ext}", data)
+            for name, (data, _mime) in encoded.items()
+        }
+
+    def _rendition_urls(self, connector, cdn_path, files, results):
+        urls = {}
+        for name, result in results.items():
+            file_name, data = files[name]
+            METRICS.inc("bytes_out", METRICS_NODE, len(data))
+            urls[name] = self._uploaded_url(connector, cdn_path, file_name, result)
+        return json.dumps(urls)
+
+    def _cleanup(self, cleanup_paths):
+        for tmp_path in cleanup_paths:
+            SCRATCH.release(tmp_path)
+
+    def run(
+        self,
+        process_id,
+        cdn_path,
+        filenames=None,
+        image=None,
+        video=None,
+        index=0,
+        renditions="",
+        prompt=None,
+        extra_pnginfo=None,
+    ):
+        connector = self._connector()
+        rendition_specs = parse_renditions(renditions or "")
+
+        passthrough, candidate, success = self._select_input(filenames, image, video, index)
+        if not success:
+            return ("", passthrough, "{}")
+
+        cleanup_paths = []
+        try:
+            with METRICS.timer(METRICS_NODE, "prepare"):
+                p = self._resolve_upload_path(candidate, image, cleanup_paths)
+            file_name = self._upload_file_name(process_id, p)
+
+            if not rendition_specs:
+                # upload using CDNConnector (upload_file accepts a file path or file-like)
+                with METRICS.timer(METRICS_NODE, "upload"):
+                    result = connector.upload_file(cdn_path, file_name, str(p))
+                METRICS.inc("bytes_out", METRICS_NODE, p.stat().st_size)
+                return (self._uploaded_url(connector, cdn_path, file_name, result), passthrough, "{}")
+
+            with ThreadPoolExecutor(max_workers=UPLOAD_CONCURRENCY) as pool:
+                # The original goes up while the renditions are being encoded
+                original = pool.submit(connector.upload_file, cdn_path, file_name, str(p))
+                files = self._render(rendition_specs, p, image if candidate is image else None, file_name)
+                with METRICS.timer(METRICS_NODE, "upload"):
+                    futures = {
+                        name: pool.submit(connector.upload_file, cdn_path, fname, io.BytesIO(data))
+                        for name, (fname, data) in files.items()
+                    }
+                    result = original.result()
+                    results = {name: future.result() for name, future in futures.items()}
+            METRICS.inc("bytes_out", METRICS_NODE, p.stat().st_size)
+            return (
+                self._uploaded_url(connector, cdn_path, file_name, result),
+                passthrough,
+                self._rendition_urls(connector, cdn_path, files, results),
+            )
+        finally:
+            self._cleanup(cleanup_paths)
+
+
+class BunnyCDNStorageNodeVideoUploadAsync(BunnyCDNStorageNodeVideoUpload):
+    """
+    Bunny upload as a native async node: the PUT goes through the shared
+    pooled aiohttp session, so uploads overlap with other network nodes.
+    """
+
+    FUNCTION = "run_async"
+
+    async def run_async(
+        self,
+        process_id,
+        cdn_path,
+        filenames=None,
+        image=None,
+        video=None,
+        index=0,
+        renditions="",
+        prompt=None,
+        extra_pnginfo=None,
+    ):
+        connector = self._connector()
+        rendition_specs = parse_renditions(renditions or "")
+
+        passthrough, candidate, success = self._select_input(filenames, image, video, index)
+        if not success:
+            return ("", passthrough, "{}")
+
+        cleanup_paths = []
+        try:
+            # Materializing tensors / VIDEO objects is CPU and disk work
+            with METRICS.timer(METRICS_NODE, "prepare"):
+                p = await asyncio.to_thread(self._resolve_upload_path, candidate, image, cleanup_paths)
+            file_name = self._upload_file_name(process_id, p)
+
+            if not rendition_specs:
+                with METRICS.timer(METRICS_NODE, "upload"):
+                    result = await connector.upload_file_async(cdn_path, file_name, str(p))
+                METRICS.inc("bytes_out", METRICS_NODE, p.stat().st_size)
+                return (self._uploaded_url(connector, cdn_path, file_name, result), passthrough, "{}")
+
+            # The original goes up while the renditions are being encoded
+            original = asyncio.ensure_future(connector.upload_file_async(cdn_path, file_name, str(p)))
             try:
-                relative_path = f"{cdn_path}/{file_name}" if cdn_path else file_name
-                uploaded_url = connector.generate_url(relative_path)
-            except Exception:
-                uploaded_url = result.get("filepath", "") if isinstance(result, dict) else ""
-            return (uploaded_url, passthrough)
+                files = await asyncio.to_thread(
+                    self._render, rendition_specs, p, image if candidate is image else None, file_name
+                )
+                with METRICS.timer(METRICS_NODE, "upload"):
+                    uploaded = await asyncio.gather(*(
+                        connector.upload_file_async(cdn_path, fname, io.BytesIO(data))
+                        for fname, data in files.values()
+                    ))
+                    result = await original
+            finally:
+                if not original.done():
+                    original.cancel()
+            METRICS.inc("bytes_out", METRICS_NODE, p.stat().st_size)
+            return (
+                self._uploaded_url(connector, cdn_path, file_name, result),
+                passthrough,
+                self._rendition_urls(connector, cdn_path, files, dict(zip(files, uploaded))),
+            )
         finally:
-            for tmp_path in cleanup_paths:
-                try:
-                    if tmp_path.exists():
-                        tmp_path.unlink()
-                except Exception:
-                    pass
\ No newline at end of file
+            self._cleanup(cleanup_paths)
+
+
+class BunnySignURLs:
+    """
+    Signs CDN paths (one per line, relative to the CDN base or full CDN
+    URLs) in bulk. With token_path one directory token covers them all.
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "paths": ("STRING", {"multiline": True, "default": "", "dynamicPrompts": False}),
+                "expiry_hours": ("FLOAT", {"default": 24.0, "min": 0.01, "max": 8760.0, "step": 0.5}),
+            },
+            "optional": {
+                "token_path": ("STRING", {"default": "", "multiline": False}),
+            },
+        }
+
+    RETURN_TYPES = ("STRING",)
+    RETURN_NAMES = ("urls",)
+    FUNCTION = "sign"
+    CATEGORY = "TFI/Video"
+
+    @classmethod
+    def IS_CHANGED(cls, expiry_hours=24.0, **kwargs):
+        # Re-sign once the rounded expiry moves on, so cached outputs never run short.
+        # A linked expiry_hours arrives as None.
+        return expires_at(float(expiry_hours or 24.0) * 3600)
+
+    def sign(self, paths, expiry_hours=24.0, token_path=""):
+        connector = BunnyCDNStorageNodeVideoUpload()._connector()
+        relative = []
+        for line in paths.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith(connector.base_cdn_url):
+                line = line[len(connector.base_cdn_url):].split("?", 1)[0]
+            relative.append(line)
+
+        urls = connector.generate_urls(relative, expiry_hours * 3600, token_path.strip() or None)
+        METRICS.inc("signed_urls", "BunnySignURLs", len(urls))
+        return ("\n".join(urls),)
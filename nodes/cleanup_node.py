@@ -1,7 +1,143 @@
 import os
-import pathlib
+import queue
+import threading
+import time
 from comfy.comfy_types.node_typing import IO
 
+from .metrics import METRICS
+
+try:
+    import folder_paths
+except ImportError:  # outside ComfyUI
+    folder_paths = None
+
+
+SWEEP_TARGETS = ["none", "output", "temp", "output+temp"]
+# Files touched this recently are never swept; they may still be being written
+SWEEP_MIN_AGE_S = 60
+# Repeated sweeps of the same directories within this window are skipped
+SWEEP_MIN_INTERVAL_S = 60
+METRICS_NODE = "CleanupFilenamesNode"
+
+
+def delete_batch(paths):
+    """Delete paths; return (deleted, missing) lists.
+
+    Each path costs a single unlink: a file that is already gone raises
+    FileNotFoundError and is reported as missing, so nothing is stat'ed or
+    listed first.
+    """
+    deleted = []
+    missing = []
+    for p in dict.fromkeys(os.path.abspath(os.fspath(p)) for p in paths):
+        try:
+            os.remove(p)
+            deleted.append(p)
+        except FileNotFoundError:
+            missing.append(p)
+        except OSError as e:
+            print(f"CleanupFilenamesNode: failed to delete {p}: {e}")
+            missing.append(p)
+    return deleted, missing
+
+
+def scan_files(root):
+    """Yield (path, mtime, size) for every regular file under root, via os.scandir."""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            st = entry.stat(follow_symlinks=False)
+                            yield entry.path, st.st_mtime, st.st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def sweep(roots, max_age_s=0, max_total_bytes=0):
+    """Apply age and total-size retention to roots; return (deleted count, freed bytes).
+
+    Files older than max_age_s go first; then the oldest remaining files are
+    removed until each root holds at most max_total_bytes.
+    """
+    now = time.time()
+    deleted = 0
+    freed = 0
+    for root in roots:
+        if not root or not os.path.isdir(root):
+            continue
+
+        kept = []
+        total = 0
+        for path, mtime, size in scan_files(root):
+            age = now - mtime
+            if age < SWEEP_MIN_AGE_S:
+                total += size
+                continue
+            if max_age_s and age > max_age_s:
+                try:
+                    os.remove(path)
+                    deleted += 1
+                    freed += size
+                    continue
+                except OSError:
+                    pass
+            kept.append((mtime, size, path))
+            total += size
+
+        if max_total_bytes and total > max_total_bytes:
+            kept.sort()
+            for mtime, size, path in kept:
+                if total <= max_total_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                deleted += 1
+                freed += size
+                total -= size
+    return deleted, freed
+
+
+class _CleanupWorker:
+    """Single daemon thread that runs deletions and sweeps off the executor thread."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="tfi-cleanup", daemon=True)
+                self._thread.start()
+        self._queue.put((fn, args))
+
+    def _run(self):
+        while True:
+            fn, args = self._queue.get()
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"CleanupFilenamesNode: background cleanup failed: {e}")
+            finally:
+                self._queue.task_done()
+
+
+CLEANUP_WORKER = _CleanupWorker()
+_last_sweep = {}
+_last_sweep_lock = threading.Lock()
+
+
 class CleanupFilenamesNode:
     @classmethod
     def INPUT_TYPES(cls):
@@ -11,6 +147,14 @@ class CleanupFilenamesNode:
                 # [ True/False, ["/path/one", "/path/two", ...] ]
                 "filenames": (IO.ANY, {}),
             },
+            "optional": {
+                # Delete on a worker thread and return immediately
+                "background": ("BOOLEAN", {"default": False}),
+                # Retention sweep of ComfyUI's own directories
+                "sweep_dirs": (SWEEP_TARGETS, {"default": "none"}),
+                "max_age_hours": ("FLOAT", {"default": 0.0, "min": 0.0, "step": 0.5}),
+                "max_total_mb": ("FLOAT", {"default": 0.0, "min": 0.0, "step": 100.0}),
+            },
         }
 
     RETURN_TYPES = ("STRING",)
@@ -18,7 +162,16 @@ class CleanupFilenamesNode:
     CATEGORY = "TFI/Utils"
     OUTPUT_NODE = False
 
-    def run(self, filenames):
+    def run(self, filenames, background=False, sweep_dirs="none", max_age_hours=0.0, max_total_mb=0.0):
+        msg_parts = [self._delete_payload(filenames, background)]
+
+        sweep_msg = self._sweep(sweep_dirs, max_age_hours, max_total_mb, background)
+        if sweep_msg:
+            msg_parts.append(sweep_msg)
+
+        return ("; ".join(msg_parts),)
+
+    def _delete_payload(self, filenames, background):
         # Comfy usually passes the raw Python object, not JSON, so
         # here we assume filenames is already a list-like structure
         # [success, [paths...]] as shown in the preview.
@@ -26,32 +179,76 @@ class CleanupFilenamesNode:
             success = filenames[0]
             paths = filenames[1] if len(filenames) > 1 else []
         except Exception:
-            return ("Invalid filenames input", filenames)
+            return "Invalid filenames input"
 
         if not success:
-            return ("No files to delete (success flag is false)",)
+            return "No files to delete (success flag is false)"
 
-        deleted = []
-        missing = []
+        paths = [p for p in paths if isinstance(p, (str, os.PathLike))]
+        if not paths:
+            return "No files provided"
 
-        for p in paths:
-            try:
-                path_obj = pathlib.Path(p)
-                if path_obj.exists():
-                    os.remove(path_obj)
-                    deleted.append(str(path_obj))
-                else:
-                    missing.append(str(path_obj))
-            except Exception:
-                missing.append(str(p))
+        if background:
+            CLEANUP_WORKER.submit(self._delete_and_log, paths)
+            return f"Queued {len(paths)} file(s) for deletion"
+
+        with METRICS.timer(METRICS_NODE, "delete"):
+            deleted, missing = delete_batch(paths)
 
         msg_parts = []
         if deleted:
             msg_parts.append(f"Deleted {len(deleted)} file(s)")
         if missing:
             msg_parts.append(f"{len(missing)} file(s) missing or failed to delete")
+        return "; ".join(msg_parts)
 
-        if not msg_parts:
-            msg_parts.append("No files provided")
+    def _delete_and_log(self, paths):
+        with METRICS.timer(METRICS_NODE, "delete"):
+            deleted, missing = delete_batch(paths)
+        if missing:
+            print(f"CleanupFilenamesNode: deleted {len(deleted)} file(s), {len(missing)} missing or failed")
 
-        return ("; ".join(msg_parts),)
+    def _sweep_roots(self, sweep_dirs):
+        if sweep_dirs == "none":
+            return []
+        if folder_paths is None:
+            raise RuntimeError("folder_paths is unavailable; sweeping needs ComfyUI")
+        roots = []
+        if sweep_dirs in ("output", "output+temp"):
+            roots.append(folder_paths.get_output_directory())
+        if sweep_dirs in ("temp", "output+temp"):
+            roots.append(folder_paths.get_temp_directory())
+        return roots
+
+    def _sweep(self, sweep_dirs, max_age_hours, max_total_mb, background):
+        if sweep_dirs == "none" or (max_age_hours <= 0 and max_total_mb <= 0):
+            return ""
+
+        try:
+            roots = self._sweep_roots(sweep_dirs)
+        except RuntimeError as e:
+            return str(e)
+
+        policy = (tuple(roots), max_age_hours, max_total_mb)
+        now = time.time()
+        with _last_sweep_lock:
+            if now - _last_sweep.get(policy, 0.0) < SWEEP_MIN_INTERVAL_S:
+                return "Sweep skipped (ran recently)"
+            _last_sweep[policy] = now
+
+        max_age_s = max_age_hours * 3600
+        max_total_bytes = int(max_total_mb * 1024 * 1024)
+
+        if background:
+            CLEANUP_WORKER.submit(self._sweep_and_log, roots, max_age_s, max_total_bytes)
+            return f"Sweep of {sweep_dirs} queued"
+
+        with METRICS.timer(METRICS_NODE, "sweep"):
+            deleted, freed = sweep(roots, max_age_s, max_total_bytes)
+        return f"Swept {deleted} file(s) ({freed / (1024 * 1024):.1f} MB) from {sweep_dirs}"
+
+    def _sweep_and_log(self, roots, max_age_s, max_total_bytes):
+        with METRICS.timer(METRICS_NODE, "sweep"):
+            deleted, freed = sweep(roots, max_age_s, max_total_bytes)
+        if deleted:
+            print(f"CleanupFilenamesNode: swept {deleted} file(s), freed {freed / (1024 * 1024):.1f} MB")
@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import TimeoutError as FutureTimeout
+from urllib.parse import urlparse
+
+from . import ranged_download
+from .util import INTERRUPT_CHECK_INTERVAL, throw_if_interrupted
+
+
+# Prefetches still running, by URL, so loaders wait instead of downloading twice
+_inflight = {}
+_inflight_lock = threading.Lock()
+# URL the current thread is prefetching; its own lookups must not wait on themselves
+_local = threading.local()
+
+
+def track_inflight(url, future):
+    with _inflight_lock:
+        _inflight[url] = future
+
+    def done(_):
+        with _inflight_lock:
+            if _inflight.get(url) is future:
+                del _inflight[url]
+
+    future.add_done_callback(done)
+
+
+@contextmanager
+def prefetching(url):
+    """Mark the current thread as the one running the prefetch of url."""
+    _local.url = url
+    try:
+        yield
+    finally:
+        _local.url = None
+
+
+def is_prefetching(url):
+    """Whether the current thread is the prefetch of url."""
+    return getattr(_local, "url", None) == url
+
+
+def is_inflight(url):
+    with _inflight_lock:
+        return url in _inflight
+
+
+def wait_for_prefetch(url):
+    """Block (interruptibly) until a running prefetch of url has finished."""
+    if is_prefetching(url):
+        return
+    with _inflight_lock:
+        future = _inflight.get(url)
+    if future is None:
+        return
+    while True:
+        throw_if_interrupted()
+        try:
+            future.exception(timeout=INTERRUPT_CHECK_INTERVAL)
+            return
+        except FutureTimeout:
+            continue
+
+
+class DownloadCache:
+    """
+    On-disk cache of prefetched media files keyed by URL.
+
+    Each entry is <sha256(url)><ext> plus a .json sidecar with the
+    ETag / Last-Modified validators. get() trusts an entry for fresh_s
+    seconds after it was fetched or last revalidated; after that it sends a
+    conditional HEAD (entries without validators simply expire). Entries
+    are touched on use and the least recently used are evicted once the
+    cache grows beyond max_bytes.
+    """
+
+    def __init__(self, root, max_bytes, fresh_s=600):
+        self.root = root
+        self.max_bytes = max(int(max_bytes), 0)
+        self.fresh_s = fresh_s
+        self._lock = threading.Lock()
+        # URLs fetched by this process; loaders skip the cache for anything else
+        self._prefetched = set()
+
+    def prefetched(self, url):
+        """Whether url was prefetched by this process (or is being), i.e. worth a get()."""
+        if is_inflight(url):
+            return True
+        with self._lock:
+            return url in self._prefetched
+
+    def _paths(self, url):
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        ext = os.path.splitext(urlparse(url).path)[1].lower()[:8]
+        return os.path.join(self.root, digest + ext), os.path.join(self.root, digest + ".json")
+
+    def _read_meta(self, meta_path):
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get(self, url, revalidate=True):
+        """Return the local path of a cached, still valid copy of url, or None."""
+        wait_for_prefetch(url)
+
+        data_path, meta_path = self._paths(url)
+        meta = self._read_meta(meta_path)
+        if meta is None or not os.path.exists(data_path):
+            return None
+
+        if revalidate and time.time() - meta.get("validated_at", meta.get("fetched_at", 0)) > self.fresh_s:
+            headers = {}
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+            if not headers or not ranged_download.probe(url, headers=headers).not_modified:
+                return None
+            meta["validated_at"] = time.time()
+            self._write_meta(meta_path, meta)
+
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+        return data_path
+
+    def _write_meta(self, meta_path, meta):
+        tmp_path = f"{meta_path}.tmp{os.getpid()}.{threading.get_ident()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def fetch(self, url):
+        """Download url into the cache (unless a valid copy is there); return its path."""
+        cached = self.get(url)
+        if cached is not None:
+            return cached
+
+        os.makedirs(self.root, exist_ok=True)
+        data_path, meta_path = self._paths(url)
+        tmp_path = f"{data_path}.tmp{os.getpid()}.{threading.get_ident()}"
+        try:
+            _, headers = ranged_download.download(url, tmp_path)
+            os.replace(tmp_path, data_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        meta = {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "size": os.path.getsize(data_path),
+            "fetched_at": time.time(),
+        }
+        self._write_meta(meta_path, meta)
+        with self._lock:
+            self._prefetched.add(url)
+
+        self._evict(keep=data_path)
+        return data_path
+
+    def _evict(self, keep=None):
+        if not self.max_bytes:
+            return
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.root):
+                if not entry.name.endswith(".json"):
+                    continue
+                meta = self._read_meta(entry.path)
+                if meta is None:
+                    continue
+                url = meta.get("url", "")
+                data_path, _ = self._paths(url)
+                try:
+                    size = os.path.getsize(data_path)
+                    last_used = entry.stat().st_mtime
+                except OSError:
+                    continue
+                entries.append((last_used, size, data_path, entry.path, url))
+                total += size
+
+            entries.sort()
+            for _, size, data_path, meta_path, url in entries:
+                if total <= self.max_bytes:
+                    break
+                if data_path == keep:
+                    continue
+                for path in (meta_path, data_path):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                self._prefetched.discard(url)
+                total -= size
+
+
+DOWNLOAD_CACHE = DownloadCache(
+    os.getenv("TFI_DOWNLOAD_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "tfi-nodes", "downloads")),
+    int(float(os.getenv("TFI_DOWNLOAD_CACHE_MB", "4096")) * 1024 * 1024),
+)
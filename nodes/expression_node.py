@@ -0,0 +1,234 @@
+import ast
+import math
+from functools import lru_cache
+
+import numpy as np
+import torch
+
+from .math_nodes import _to_int, _vectorize, _wrap
+
+
+VARIABLES = ("a", "b", "c", "d")
+CONSTANTS = {"pi": math.pi, "e": math.e}
+
+
+class _ScalarOps:
+    """Float semantics matching the single-value math nodes."""
+
+    const = staticmethod(float)
+
+    @staticmethod
+    def div(a, b):
+        return 0.0 if b == 0 else a / b
+
+    @staticmethod
+    def mod(a, b):
+        return 0.0 if b == 0 else a % b
+
+    floor = staticmethod(lambda v: float(math.floor(v)))
+    ceil = staticmethod(lambda v: float(math.ceil(v)))
+    round = staticmethod(lambda v: float(round(v)))
+    abs = staticmethod(abs)
+    sqrt = staticmethod(math.sqrt)
+    minimum = staticmethod(min)
+    maximum = staticmethod(max)
+
+
+class _ArrayOps:
+    """Elementwise semantics over NumPy arrays or torch tensors (xp)."""
+
+    def __init__(self, xp, ref):
+        self.xp = xp
+        self.ref = ref
+
+    def const(self, value):
+        # 0-d array/tensor so torch ops such as minimum() accept constants
+        if self.xp is np:
+            return np.float64(value)
+        return torch.as_tensor(value, dtype=self.ref.dtype, device=self.ref.device)
+
+    def _safe(self, b):
+        zero = b == 0
+        return zero, self.xp.where(zero, self.xp.ones_like(b), b)
+
+    def div(self, a, b):
+        zero, b = self._safe(b)
+        q = a / b
+        return self.xp.where(zero, self.xp.zeros_like(q), q)
+
+    def mod(self, a, b):
+        zero, b = self._safe(b)
+        r = a % b
+        return self.xp.where(zero, self.xp.zeros_like(r), r)
+
+    def floor(self, v):
+        return self.xp.floor(v)
+
+    def ceil(self, v):
+        return self.xp.ceil(v)
+
+    def round(self, v):
+        return self.xp.round(v)
+
+    def abs(self, v):
+        return self.xp.abs(v)
+
+    def sqrt(self, v):
+        return self.xp.sqrt(v)
+
+    def minimum(self, a, b):
+        return self.xp.minimum(a, b)
+
+    def maximum(self, a, b):
+        return self.xp.maximum(a, b)
+
+
+def _clamp(ops, v, lo, hi):
+    # Same as ClampNode: swapped bounds are tolerated
+    lo, hi = ops.minimum(lo, hi), ops.maximum(lo, hi)
+    return ops.minimum(ops.maximum(v, lo), hi)
+
+
+def _reduce(fn):
+    def call(ops, *args):
+        result = args[0]
+        for arg in args[1:]:
+            result = fn(ops, result, arg)
+        return result
+    return call
+
+
+# name -> (min args, max args or None for variadic, implementation(ops, *args))
+FUNCTIONS = {
+    "floor": (1, 1, lambda ops, v: ops.floor(v)),
+    "ceil": (1, 1, lambda ops, v: ops.ceil(v)),
+    "round": (1, 1, lambda ops, v: ops.round(v)),
+    "abs": (1, 1, lambda ops, v: ops.abs(v)),
+    "sqrt": (1, 1, lambda ops, v: ops.sqrt(v)),
+    "min": (2, None, _reduce(lambda ops, a, b: ops.minimum(a, b))),
+    "max": (2, None, _reduce(lambda ops, a, b: ops.maximum(a, b))),
+    "clamp": (3, 3, _clamp),
+    "div": (2, 2, lambda ops, a, b: ops.div(a, b)),
+}
+
+BINARY_OPERATORS = {
+    ast.Add: lambda ops, a, b: a + b,
+    ast.Sub: lambda ops, a, b: a - b,
+    ast.Mult: lambda ops, a, b: a * b,
+    # "/" follows DivideNode: division by zero yields 0
+    ast.Div: lambda ops, a, b: ops.div(a, b),
+    ast.FloorDiv: lambda ops, a, b: ops.floor(ops.div(a, b)),
+    ast.Mod: lambda ops, a, b: ops.mod(a, b),
+    ast.Pow: lambda ops, a, b: a ** b,
+}
+
+UNARY_OPERATORS = {
+    ast.UAdd: lambda v: v,
+    ast.USub: lambda v: -v,
+}
+
+
+def _compile_node(node):
+    """Translate a whitelisted AST node into a closure fn(ops, env)."""
+    if isinstance(node, ast.Expression):
+        return _compile_node(node.body)
+
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ValueError(f"Unsupported constant: {node.value!r}")
+        value = float(node.value)
+        return lambda ops, env: ops.const(value)
+
+    if isinstance(node, ast.Name):
+        name = node.id
+        if name in CONSTANTS:
+            value = CONSTANTS[name]
+            return lambda ops, env: ops.const(value)
+        if name not in VARIABLES:
+            raise ValueError(f"Unknown variable '{name}' (available: {', '.join(VARIABLES)})")
+        return lambda ops, env: env[name]
+
+    if isinstance(node, ast.BinOp):
+        op = BINARY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise ValueError(f"Unsupported operator: {type(node.op).__name__}")
+        left, right = _compile_node(node.left), _compile_node(node.right)
+        return lambda ops, env: op(ops, left(ops, env), right(ops, env))
+
+    if isinstance(node, ast.UnaryOp):
+        op = UNARY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise ValueError(f"Unsupported operator: {type(node.op).__name__}")
+        operand = _compile_node(node.operand)
+        return lambda ops, env: op(operand(ops, env))
+
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+            raise ValueError(f"Unsupported function call (available: {', '.join(FUNCTIONS)})")
+        if node.keywords:
+            raise ValueError("Keyword arguments are not supported")
+        name = node.func.id
+        min_args, max_args, impl = FUNCTIONS[name]
+        if len(node.args) < min_args or (max_args is not None and len(node.args) > max_args):
+            raise ValueError(f"Wrong number of arguments for {name}()")
+        args = [_compile_node(arg) for arg in node.args]
+        return lambda ops, env: impl(ops, *[arg(ops, env) for arg in args])
+
+    raise ValueError(f"Unsupported syntax: {type(node).__name__}")
+
+
+@lru_cache(maxsize=256)
+def compile_expression(expression):
+    """Parse and compile an expression once; cached by its text."""
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression: {e.msg}") from e
+    return _compile_node(tree)
+
+
+class ExpressionNode:
+    """
+    Evaluate a formula such as "floor(a * b)" over named inputs a-d.
+
+    Replaces chains of the single-operation math nodes with one executor step.
+    Inputs may be scalars or lists / arrays / tensors, like the other math nodes.
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "expression": ("STRING", {"default": "a + b", "multiline": False, "dynamicPrompts": False}),
+            },
+            "optional": {
+                "a": ("FLOAT", {"default": 0.0}),
+                "b": ("FLOAT", {"default": 0.0}),
+                "c": ("FLOAT", {"default": 0.0}),
+                "d": ("FLOAT", {"default": 0.0}),
+            },
+        }
+
+    RETURN_TYPES = ("FLOAT", "INT")
+    RETURN_NAMES = ("result", "result_int")
+    FUNCTION = "compute"
+    CATEGORY = "TFI/Math"
+
+    def compute(self, expression, a=0.0, b=0.0, c=0.0, d=0.0):
+        fn = compile_expression(expression)
+
+        vec = _vectorize(a, b, c, d)
+        if vec is None:
+            env = {"a": float(a), "b": float(b), "c": float(c), "d": float(d)}
+            result = float(fn(_ScalarOps, env))
+            if not math.isfinite(result):
+                raise ValueError(f"Expression {expression!r} evaluated to {result}, which has no integer value")
+            return (result, int(math.floor(result)))
+
+        xp, arrays, like = vec
+        result = fn(_ArrayOps(xp, arrays[0]), dict(zip(VARIABLES, arrays)))
+        # Broadcast to every input's shape, even if the formula ignores some inputs
+        result = result + sum(xp.zeros_like(x) for x in arrays)
+        if not bool(xp.isfinite(result).all()):
+            raise ValueError(f"Expression {expression!r} evaluated to inf or nan, which has no integer value")
+        return (_wrap(result, like), _wrap(_to_int(xp, xp.floor(result)), like))
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+
+
+def hash_image_tensor(image):
+    """Stable content hash of an IMAGE tensor (or list of tensors)."""
+    if isinstance(image, (list, tuple)) and image:
+        image = image[0]
+    arr = np.ascontiguousarray(image.detach().cpu().numpy())
+    h = hashlib.blake2b(digest_size=20)
+    h.update(str((arr.shape, arr.dtype.str)).encode("utf-8"))
+    h.update(memoryview(arr).cast("B"))
+    return h.hexdigest()
+
+
+def fingerprint(params):
+    """Hash a JSON-serialisable request description into a cache key."""
+    blob = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class FluxResultCache:
+    """
+    Content-addressed disk cache of FLUX results.
+
+    Each entry is a directory holding the encoded samples exactly as the API
+    returned them (no re-encode) plus a small meta.json. Entries are touched
+    on read and the least recently used ones are evicted once the cache grows
+    beyond max_bytes.
+    """
+
+    META_NAME = "meta.json"
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max(int(max_bytes), 0)
+        self._lock = threading.Lock()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key)
+
+    def contains(self, key):
+        return os.path.exists(os.path.join(self._entry_dir(key), self.META_NAME))
+
+    def get(self, key):
+        """Return (list of encoded sample bytes, meta dict) or None."""
+        entry_dir = self._entry_dir(key)
+        meta_path = os.path.join(entry_dir, self.META_NAME)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            samples = []
+            for name in meta["files"]:
+                with open(os.path.join(entry_dir, name), "rb") as f:
+                    samples.append(f.read())
+            os.utime(meta_path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"FluxResultCache: dropping unreadable entry {key}: {e}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+        return samples, meta
+
+    def put(self, key, samples, meta):
+        os.makedirs(self.root, exist_ok=True)
+        entry_dir = self._entry_dir(key)
+        tmp_dir = f"{entry_dir}.tmp{os.getpid()}.{threading.get_ident()}"
+        os.makedirs(tmp_dir, exist_ok=True)
+        try:
+            files = []
+            for i, data in enumerate(samples):
+                name = f"{i}.bin"
+                with open(os.path.join(tmp_dir, name), "wb") as f:
+                    f.write(data)
+                files.append(name)
+            with open(os.path.join(tmp_dir, self.META_NAME), "w", encoding="utf-8") as f:
+                json.dump(dict(meta, files=files, created=time.time()), f)
+
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+        except Exception as e:
+            print(f"FluxResultCache: failed to store {key}: {e}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+        self._evict()
+
+    def _evict(self):
+        if not self.max_bytes:
+            return
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.root):
+                if not entry.is_dir() or ".tmp" in entry.name:
+                    continue
+                size = 0
+                last_used = 0.0
+                try:
+                    for f in os.scandir(entry.path):
+                        st = f.stat()
+                        size += st.st_size
+                        if f.name == self.META_NAME:
+                            last_used = st.st_mtime
+                except FileNotFoundError:
+                    continue
+                entries.append((last_used, size, entry.path))
+                total += size
+
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+
+
+FLUX_CACHE = FluxResultCache(
+    os.getenv("TFI_FLUX_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "tfi-nodes", "flux")),
+    int(float(os.getenv("TFI_FLUX_CACHE_MB", "2048")) * 1024 * 1024),
+)
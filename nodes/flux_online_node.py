@@ -1,20 +1,41 @@
+import asyncio
 import os
+import re
 import time
 import io
-from typing import Any, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 
-import requests
+import torch
+from PIL import Image
 
 from .util import (
-    pil_to_tensor,
+    pil_to_tensor_into,
     base64_to_image,
     read_image_from_url,
     tensor_to_pil,
-    image_to_base64,
+    encode_image,
+    bytes_to_data_url,
+    throw_if_interrupted,
+    INTERRUPT_CHECK_INTERVAL,
 )
+from .flux_cache import FLUX_CACHE, fingerprint, hash_image_tensor
+from .flux_scheduler import FLUX_SCHEDULER
+from .http_transport import retry_after_seconds
+from .flux_webhook import FLUX_WEBHOOK
+from .metrics import METRICS
+from .single_flight import SingleFlight
 from comfy.comfy_types.node_typing import IO
 
 
+# Identical in-flight requests share one BFL job. Set TFI_FLUX_SINGLEFLIGHT_DIR to
+# also deduplicate across processes on the same host (flock based).
+FLUX_SINGLE_FLIGHT = SingleFlight(os.getenv("TFI_FLUX_SINGLEFLIGHT_DIR", ""))
+
+# Metrics label shared by the sync and async generators
+METRICS_NODE = "FLUXImageGeneratorOnline"
+
+
 class FLUXImageGeneratorOnline:
     @classmethod
     def INPUT_TYPES(cls):
@@ -33,8 +54,21 @@ class FLUXImageGeneratorOnline:
                 "ref_2": (IO.IMAGE, {}),
                 "ref_3": (IO.IMAGE, {}),
                 "ref_4": (IO.IMAGE, {}),
+                # Upload encoding for references: png (lossless), jpeg or webp at ref_quality.
+                "ref_format": ("STRING", {"default": "png"}),
+                "ref_quality": ("INT", {"default": 90, "min": 1, "max": 100, "step": 1}),
                 "poll_interval_ms": ("INT", {"default": 2000, "min": 500, "max": 10000, "step": 500}),
                 "timeout_ms": ("INT", {"default": 600000, "min": 10000, "max": 1800000, "step": 10000}),
+                # Batch mode: one prompt per line and/or a comma separated list of seeds.
+                # A single prompt or seed is broadcast against the other list.
+                "batch_prompts": ("STRING", {"multiline": True, "default": "", "dynamicPrompts": False}),
+                "batch_seeds": ("STRING", {"default": ""}),
+                "max_concurrency": ("INT", {"default": 4, "min": 1, "max": 24, "step": 1}),
+                # Ask BFL to call back the local listener (TFI_FLUX_WEBHOOK_PUBLIC_URL) on completion;
+                # polling continues at a slow rate as a safety net.
+                "use_webhook": ("BOOLEAN", {"default": False}),
+                # Reuse results from the on-disk cache (TFI_FLUX_CACHE_DIR) for identical requests.
+                "use_cache": ("BOOLEAN", {"default": False}),
             },
         }
 
@@ -43,7 +77,13 @@ class FLUXImageGeneratorOnline:
     FUNCTION = "generate"
     CATEGORY = "TFI/Image"
 
-    API_HOST = "https://api.bfl.ai"
+    API_HOST = os.getenv("BFL_API_HOST", "https://api.bfl.ai").rstrip("/")
+
+    # Adaptive polling: start fast and back off towards poll_interval_ms.
+    POLL_INITIAL_MS = 250
+    POLL_BACKOFF = 1.5
+    # Poll cap while a webhook callback is expected to wake the waiter.
+    WEBHOOK_POLL_MAX_MS = 15000
 
     def _resolve_api_key(self) -> str:
         key = os.getenv("BFL_API_KEY", "").strip()
@@ -59,7 +99,16 @@ class FLUXImageGeneratorOnline:
             "x-key": api_key,
         }
 
-        resp = requests.post(url, json=payload, headers=headers, timeout=60)
+        # Reference images make up nearly all of the request body
+        METRICS.inc(
+            "bytes_out", METRICS_NODE,
+            sum(len(v) for k, v in payload.items() if k.startswith("input_image") and isinstance(v, str)),
+        )
+
+        # 429 and failed connects are retried with backoff by the shared scheduler; a 5xx or
+        # timeout is not, since the job may already have been accepted (and billed)
+        with METRICS.timer(METRICS_NODE, "trigger"):
+            resp = FLUX_SCHEDULER.request("POST", url, json=payload, headers=headers, timeout=60)
         resp.raise_for_status()
         data = resp.json()
         if "polling_url" not in data:
@@ -68,34 +117,197 @@ class FLUXImageGeneratorOnline:
 
     def _get_result_from_polling_url(self, api_key: str, polling_url: str) -> Dict[str, Any]:
         headers = {"x-key": api_key}
-        resp = requests.get(polling_url, headers=headers, timeout=60)
+        METRICS.inc("polls", METRICS_NODE)
+        with METRICS.timer(METRICS_NODE, "poll"):
+            resp = FLUX_SCHEDULER.request("GET", polling_url, headers=headers, timeout=60)
+        if resp.status_code in (429, 503):
+            # Still throttled after retries: report as pending and let the caller honour Retry-After
+            return {"status": "Pending", "retry_after_ms": retry_after_seconds(resp) * 1000.0}
         resp.raise_for_status()
         return resp.json()
 
+    def _pause(self, seconds: float, task_ids=None):
+        """Wait up to seconds between polls.
+
+        Returns early with the ids whose webhook callback arrived, and raises if
+        the prompt is interrupted so the executor thread is freed promptly.
+        """
+        deadline = time.time() + max(seconds, 0.0)
+        while True:
+            throw_if_interrupted()
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return set()
+            step = min(remaining, INTERRUPT_CHECK_INTERVAL)
+            if task_ids:
+                woken = FLUX_WEBHOOK.wait_any(task_ids, step)
+                if woken:
+                    return woken
+            else:
+                time.sleep(step)
+
     def _wait_for_result(
         self,
         api_key: str,
         polling_url: str,
         poll_interval_ms: int,
         timeout_ms: int,
+        task_id: Optional[str] = None,
     ) -> Dict[str, Any]:
-        start = time.time() * 1000.0
-
-        while True:
-            result = self._get_result_from_polling_url(api_key, polling_url)
-            status = str(result.get("status", "")).lower()
-
-            if status == "ready":
-                return result
+        """Poll until the job is ready.
 
-            if (time.time() * 1000.0) - start > timeout_ms:
-                raise TimeoutError(f"Timeout while waiting for result from {polling_url}")
+        With a task_id the wait between polls is cut short by the webhook
+        callback for that task; polling then only serves as a fallback.
+        """
+        start = time.time() * 1000.0
+        max_delay_ms = max(poll_interval_ms, 100)
+        if task_id:
+            max_delay_ms = max(max_delay_ms, self.WEBHOOK_POLL_MAX_MS)
+        delay_ms = min(self.POLL_INITIAL_MS, max_delay_ms)
 
-            time.sleep(max(poll_interval_ms, 100) / 1000.0)
+        try:
+            while True:
+                result = self._get_result_from_polling_url(api_key, polling_url)
+                status = str(result.get("status", "")).lower()
+
+                if status == "ready":
+                    return result
+
+                elapsed_ms = (time.time() * 1000.0) - start
+                if elapsed_ms > timeout_ms:
+                    raise TimeoutError(f"Timeout while waiting for result from {polling_url}")
+
+                wait_ms = max(delay_ms, result.get("retry_after_ms") or 0.0)
+                wait_ms = min(wait_ms, max(timeout_ms - elapsed_ms, 0.0) + 100.0)
+                if self._pause(wait_ms / 1000.0, [task_id] if task_id else None):
+                    FLUX_WEBHOOK.forget(task_id)
+                    delay_ms = min(self.POLL_INITIAL_MS, max_delay_ms)
+                    continue
+                delay_ms = min(delay_ms * self.POLL_BACKOFF, max_delay_ms)
+        finally:
+            if task_id:
+                FLUX_WEBHOOK.forget(task_id)
+
+    def _parse_batch(self, prompt: str, seed: int, batch_prompts: str, batch_seeds: str):
+        """Return a list of (prompt, seed) jobs, or None when batch mode is off."""
+        prompts = [line.strip() for line in (batch_prompts or "").splitlines() if line.strip()]
+        seeds = [int(tok) for tok in re.split(r"[\s,;]+", (batch_seeds or "").strip()) if tok]
+
+        if not prompts and not seeds:
+            return None
+
+        prompts = prompts or [prompt]
+        seeds = seeds or [seed]
+        if len(prompts) > 1 and len(seeds) > 1 and len(prompts) != len(seeds):
+            raise ValueError(
+                f"batch_prompts has {len(prompts)} entries but batch_seeds has {len(seeds)}; "
+                "provide matching lengths or a single value for one of them"
+            )
+
+        count = max(len(prompts), len(seeds))
+        if len(prompts) == 1:
+            prompts = prompts * count
+        if len(seeds) == 1:
+            seeds = seeds * count
+        return list(zip(prompts, seeds))
+
+    def _run_batch(
+        self,
+        api_key: str,
+        model: str,
+        payloads: List[Dict[str, Any]],
+        poll_interval_ms: int,
+        timeout_ms: int,
+        max_concurrency: int,
+        use_webhook: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Run several jobs with at most max_concurrency active at once.
+
+        A single loop polls every active job per round, so the batch takes
+        roughly one job's latency per max_concurrency jobs instead of one per job.
+        Jobs also need a host-wide slot from FLUX_SCHEDULER; while none is free
+        they stay queued here.
+        """
+        max_concurrency = max(1, int(max_concurrency))
+        results: List[Optional[Dict[str, Any]]] = [None] * len(payloads)
+        pending = list(enumerate(payloads))
+        active: Dict[int, Any] = {}
+        max_delay_ms = max(poll_interval_ms, 100)
+        if use_webhook:
+            max_delay_ms = max(max_delay_ms, self.WEBHOOK_POLL_MAX_MS)
+        delay_ms = min(self.POLL_INITIAL_MS, max_delay_ms)
+        slots: Dict[int, Any] = {}
+        queued_since = FLUX_SCHEDULER.enqueue(len(pending))
 
-    def _ref_image_to_data_url(self, ref_image: Any):
+        try:
+            with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+                while pending or active:
+                    starting = []
+                    while pending and len(active) + len(starting) < max_concurrency:
+                        slot = FLUX_SCHEDULER.try_acquire(api_key, queued_since)
+                        if slot is None:
+                            break
+                        job = pending.pop(0)
+                        slots[job[0]] = slot
+                        starting.append(job)
+                    # Host-wide slots or submission tokens are exhausted
+                    starved = bool(pending) and not starting and len(active) < max_concurrency
+
+                    triggered = pool.map(lambda job: self._trigger(api_key, model, job[1]), starting)
+                    for (idx, _), async_resp in zip(starting, triggered):
+                        polling_url = async_resp.get("polling_url")
+                        if not polling_url:
+                            raise RuntimeError(f"BFL API did not return a polling_url: {async_resp}")
+                        active[idx] = (polling_url, time.time() * 1000.0, async_resp.get("id"))
+                    if starting:
+                        delay_ms = min(self.POLL_INITIAL_MS, max_delay_ms)
+
+                    polling = list(active.items())
+                    polled = pool.map(
+                        lambda item: self._get_result_from_polling_url(api_key, item[1][0]),
+                        polling,
+                    )
+                    now = time.time() * 1000.0
+                    retry_after_ms = 0.0
+                    for (idx, (polling_url, started, task_id)), result in zip(polling, polled):
+                        status = str(result.get("status", "")).lower()
+                        if status == "ready":
+                            results[idx] = result
+                            del active[idx]
+                            FLUX_SCHEDULER.release(api_key, slots.pop(idx))
+                            if use_webhook and task_id:
+                                FLUX_WEBHOOK.forget(task_id)
+                        elif now - started > timeout_ms:
+                            raise TimeoutError(f"Timeout while waiting for result from {polling_url}")
+                        else:
+                            retry_after_ms = max(retry_after_ms, result.get("retry_after_ms") or 0.0)
+
+                    if not active:
+                        if starved:
+                            self._pause(self.POLL_INITIAL_MS / 1000.0)
+                        continue
+
+                    # Only wait when no slot was freed for a queued job
+                    if not pending or len(active) >= max_concurrency or starved:
+                        wait_ms = max(delay_ms, retry_after_ms)
+                        task_ids = [task_id for _, _, task_id in active.values() if task_id]
+                        woken = self._pause(wait_ms / 1000.0, task_ids if use_webhook else None)
+                        for task_id in woken:
+                            FLUX_WEBHOOK.forget(task_id)
+                        if woken:
+                            delay_ms = min(self.POLL_INITIAL_MS, max_delay_ms)
+                            continue
+                        delay_ms = min(delay_ms * self.POLL_BACKOFF, max_delay_ms)
+        finally:
+            FLUX_SCHEDULER.dequeue(len(pending))
+            for slot in slots.values():
+                FLUX_SCHEDULER.release(api_key, slot)
+
+        return results
+
+    def _ref_image_to_data_url(self, ref_image: Any, ref_format: str = "png", ref_quality: int = 90):
         """Convert an IMAGE tensor (or list of tensors) into a base64 data URL string
-        and return (data_url, size_mb, megapixels) based on PNG-encoded bytes.
+        and return (data_url, size_mb, megapixels) based on the uploaded encoded bytes.
         """
         if ref_image is None:
             raise ValueError("Reference IMAGE is None")
@@ -105,20 +317,19 @@ class FLUXImageGeneratorOnline:
             img_tensor = img_tensor[0]
 
         pil_img = tensor_to_pil(img_tensor)
-        # Measure encoded size in bytes (PNG) for credit calculation
-        buffer = io.BytesIO()
-        pil_img.save(buffer, format="PNG")
-        size_bytes = buffer.tell()
-        image_size_mb = float(size_bytes) / (1024.0 * 1024.0)
+        # Encode once; the same bytes are measured for credit calculation and uploaded
+        encoded, mime = encode_image(pil_img, ref_format, ref_quality)
+        image_size_mb = float(len(encoded)) / (1024.0 * 1024.0)
 
         # Megapixels from image resolution
         width, height = pil_img.size
         megapixels = float(width * height) / 1_000_000.0
 
-        data_url = image_to_base64(pil_img)
+        data_url = bytes_to_data_url(encoded, mime)
         return data_url, image_size_mb, megapixels
 
     def _sample_to_pil(self, sample: Any):
+        """Return (PIL image, raw encoded bytes) for a BFL sample URL or base64 string."""
         if isinstance(sample, (list, tuple)) and sample:
             sample = sample[0]
 
@@ -129,22 +340,104 @@ class FLUXImageGeneratorOnline:
 
         # Heuristic: URL vs base64/data URI
         if sample_str.startswith("http://") or sample_str.startswith("https://"):
-            img = read_image_from_url(sample_str)
+            img, raw = read_image_from_url(sample_str, return_bytes=True)
             if img is None:
                 raise RuntimeError("Failed to load image from URL returned by BFL API")
-            return img
+            return img, raw
 
         try:
-            return base64_to_image(sample_str)
+            return base64_to_image(sample_str, return_bytes=True)
         except Exception:
             # As a last resort, try treating it as a URL
             if sample_str.startswith("http://") or sample_str.startswith("https://"):
-                img = read_image_from_url(sample_str)
+                img, raw = read_image_from_url(sample_str, return_bytes=True)
                 if img is None:
                     raise RuntimeError("Failed to load image from URL returned by BFL API")
-                return img
+                return img, raw
             raise
 
+    def _decode_cached_sample(self, data: bytes):
+        img = Image.open(io.BytesIO(data))
+        img.load()
+        return img if img.mode == "RGB" else img.convert("RGB")
+
+    def _result_to_image(self, final_result: Dict[str, Any]):
+        """Decode a ready result and return (RGB PIL image, raw encoded bytes, megapixels)."""
+        sample = (
+            (final_result.get("result") or {}).get("sample")
+            if isinstance(final_result.get("result"), dict)
+            else final_result.get("sample")
+        )
+
+        if not sample:
+            raise RuntimeError(f"BFL API result is ready but no 'sample' field was found: {final_result}")
+
+        img, raw = self._sample_to_pil(sample)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+
+        out_width, out_height = img.size
+        output_megapixels = float(out_width * out_height) / 1_000_000.0
+        return img, raw, output_megapixels
+
+    def _images_to_tensor(self, images, pool):
+        """Decode RGB PIL images into one preallocated IMAGE batch."""
+        sizes = {img.size for img in images}
+        if len(sizes) > 1:
+            raise RuntimeError(f"BFL API returned images of different sizes for one batch: {sorted(sizes)}")
+
+        out_width, out_height = images[0].size
+        image_tensor = torch.empty((len(images), out_height, out_width, 3), dtype=torch.float32)
+        list(pool.map(lambda i: pil_to_tensor_into(images[i], image_tensor[i]), range(len(images))))
+        return image_tensor
+
+    @classmethod
+    def _cache_key(cls, prompt, model, width, height, seed, safety_tolerance, output_format, **kwargs):
+        """Fingerprint of everything that determines the generated image(s)."""
+        refs = {}
+        for name in ("ref_1", "ref_2", "ref_3", "ref_4"):
+            ref = kwargs.get(name)
+            refs[name] = hash_image_tensor(ref) if ref is not None else None
+
+        return fingerprint({
+            "model": (model or "flux-2-klein-9b").strip(),
+            "prompt": prompt,
+            "width": int(width),
+            "height": int(height),
+            "seed": int(seed),
+            "safety_tolerance": int(safety_tolerance),
+            "output_format": output_format if output_format in ("png", "jpeg") else "png",
+            "refs": refs,
+            "ref_format": kwargs.get("ref_format", "png"),
+            "ref_quality": int(kwargs.get("ref_quality", 90)),
+            "batch_prompts": kwargs.get("batch_prompts", "") or "",
+            "batch_seeds": kwargs.get("batch_seeds", "") or "",
+        })
+
+    @classmethod
+    def IS_CHANGED(cls, use_cache=False, **kwargs):
+        # ComfyUI passes linked inputs here as None (unconnected optional ones are
+        # absent). The value must depend on the inputs alone; cache hits and misses
+        # are handled in generate().
+        if not use_cache or kwargs.get("prompt") is None:
+            return ""
+        if any(name in kwargs and kwargs[name] is None for name in ("ref_1", "ref_2", "ref_3", "ref_4")):
+            return ""
+        try:
+            return cls._cache_key(
+                kwargs.pop("prompt"),
+                kwargs.pop("model", ""),
+                kwargs.pop("width", 1024),
+                kwargs.pop("height", 1024),
+                kwargs.pop("seed", 0),
+                kwargs.pop("safety_tolerance", 2),
+                kwargs.pop("output_format", "png"),
+                **kwargs,
+            )
+        except (TypeError, ValueError):
+            # Another input is linked
+            return ""
+
     def generate(
         self,
         prompt: str,
@@ -158,9 +451,34 @@ class FLUXImageGeneratorOnline:
         ref_2=None,
         ref_3=None,
         ref_4=None,
+        ref_format: str = "png",
+        ref_quality: int = 90,
         poll_interval_ms: int = 2000,
         timeout_ms: int = 600000,
+        batch_prompts: str = "",
+        batch_seeds: str = "",
+        max_concurrency: int = 4,
+        use_webhook: bool = False,
+        use_cache: bool = False,
     ):
+        cache_key = None
+        if use_cache:
+            cache_key = self._cache_key(
+                prompt, model, width, height, seed, safety_tolerance, output_format,
+                ref_1=ref_1, ref_2=ref_2, ref_3=ref_3, ref_4=ref_4,
+                ref_format=ref_format, ref_quality=ref_quality,
+                batch_prompts=batch_prompts, batch_seeds=batch_seeds,
+            )
+            cached = FLUX_CACHE.get(cache_key)
+            METRICS.inc("cache_hits" if cached is not None else "cache_misses", METRICS_NODE)
+            if cached is not None:
+                samples, meta = cached
+                with METRICS.timer(METRICS_NODE, "decode"), \
+                        ThreadPoolExecutor(max_workers=max(1, min(len(samples), int(max_concurrency)))) as pool:
+                    images = list(pool.map(self._decode_cached_sample, samples))
+                    image_tensor = self._images_to_tensor(images, pool)
+                return (image_tensor, float(meta["image_size_mb"]), float(meta["total_megapixels"]))
+
         api_key = self._resolve_api_key()
 
         payload: Dict[str, Any] = {
@@ -175,60 +493,102 @@ class FLUXImageGeneratorOnline:
         total_input_size_mb = 0.0
         total_input_megapixels = 0.0
 
-        # Map ref_1..ref_4 to the API's reference image fields if provided
-        if ref_1 is not None:
-            data_url, size_mb, mp = self._ref_image_to_data_url(ref_1)
-            payload["input_image"] = data_url
-            total_input_size_mb += size_mb
-            total_input_megapixels += mp
-        if ref_2 is not None:
-            data_url, size_mb, mp = self._ref_image_to_data_url(ref_2)
-            payload["input_image_2"] = data_url
-            total_input_size_mb += size_mb
-            total_input_megapixels += mp
-        if ref_3 is not None:
-            data_url, size_mb, mp = self._ref_image_to_data_url(ref_3)
-            payload["input_image_3"] = data_url
-            total_input_size_mb += size_mb
-            total_input_megapixels += mp
-        if ref_4 is not None:
-            data_url, size_mb, mp = self._ref_image_to_data_url(ref_4)
-            payload["input_image_4"] = data_url
-            total_input_size_mb += size_mb
-            total_input_megapixels += mp
-
-        async_resp = self._trigger(api_key, model, payload)
-        polling_url: Optional[str] = async_resp.get("polling_url")
-        if not polling_url:
-            raise RuntimeError(f"BFL API did not return a polling_url: {async_resp}")
-
-        final_result = self._wait_for_result(api_key, polling_url, poll_interval_ms, timeout_ms)
-        sample = (
-            (final_result.get("result") or {}).get("sample")
-            if isinstance(final_result.get("result"), dict)
-            else final_result.get("sample")
-        )
+        # Map ref_1..ref_4 to the API's reference image fields if provided,
+        # encoding them in parallel (PIL releases the GIL while compressing)
+        refs = [
+            (field, ref)
+            for field, ref in (
+                ("input_image", ref_1),
+                ("input_image_2", ref_2),
+                ("input_image_3", ref_3),
+                ("input_image_4", ref_4),
+            )
+            if ref is not None
+        ]
+        if refs:
+            with METRICS.timer(METRICS_NODE, "encode"), ThreadPoolExecutor(max_workers=len(refs)) as pool:
+                encoded_refs = list(
+                    pool.map(lambda item: self._ref_image_to_data_url(item[1], ref_format, ref_quality), refs)
+                )
+            for (field, _), (data_url, size_mb, mp) in zip(refs, encoded_refs):
+                payload[field] = data_url
+                total_input_size_mb += size_mb
+                total_input_megapixels += mp
+
+        use_webhook = bool(use_webhook) and FLUX_WEBHOOK.ensure_started()
+        if use_webhook:
+            payload["webhook_url"] = FLUX_WEBHOOK.callback_url()
+
+        jobs = self._parse_batch(prompt, seed, batch_prompts, batch_seeds)
+        if jobs is not None:
+            payloads = [dict(payload, prompt=job_prompt, seed=job_seed) for job_prompt, job_seed in jobs]
+        else:
+            payloads = [payload]
+
+        def run_jobs():
+            if jobs is not None:
+                return self._run_batch(
+                    api_key, model, payloads, poll_interval_ms, timeout_ms, max_concurrency, use_webhook
+                )
+
+            # Queue for a host-wide slot instead of failing with 429 under bursts
+            slot = FLUX_SCHEDULER.acquire(api_key)
+            try:
+                async_resp = self._trigger(api_key, model, payload)
+                polling_url: Optional[str] = async_resp.get("polling_url")
+                if not polling_url:
+                    raise RuntimeError(f"BFL API did not return a polling_url: {async_resp}")
+
+                task_id = async_resp.get("id") if use_webhook else None
+                return [self._wait_for_result(api_key, polling_url, poll_interval_ms, timeout_ms, task_id)]
+            finally:
+                FLUX_SCHEDULER.release(api_key, slot)
+
+        # The webhook URL is per process and does not change what gets generated
+        flight_key = fingerprint({
+            "model": (model or "flux-2-klein-9b").strip(),
+            "payloads": [{k: v for k, v in p.items() if k != "webhook_url"} for p in payloads],
+        })
+        # Followers share the JSON results and decode their own tensors below
+        with METRICS.timer(METRICS_NODE, "generate"):
+            final_results = FLUX_SINGLE_FLIGHT.do(flight_key, run_jobs)
+
+        # Fetching the samples and decoding them happen together per result
+        with METRICS.timer(METRICS_NODE, "download_decode"), \
+                ThreadPoolExecutor(max_workers=max(1, min(len(final_results), int(max_concurrency)))) as pool:
+            decoded = list(pool.map(self._result_to_image, final_results))
+            image_tensor = self._images_to_tensor([img for img, _, _ in decoded], pool)
+
+        # Total size includes all input reference images plus output image(s); the output
+        # size is measured on the encoded bytes the API returned. Every job uploads the
+        # references, so input usage is counted per job.
+        output_bytes = sum(len(raw) for _, raw, _ in decoded)
+        output_image_size_mb = float(output_bytes) / (1024.0 * 1024.0)
+        METRICS.inc("bytes_in", METRICS_NODE, output_bytes)
+        image_size_mb = total_input_size_mb * len(decoded) + output_image_size_mb
+
+        # Total megapixels includes all input reference images plus output image(s)
+        total_megapixels = total_input_megapixels * len(decoded) + sum(mp for _, _, mp in decoded)
+
+        if cache_key is not None:
+            FLUX_CACHE.put(
+                cache_key,
+                [raw for _, raw, _ in decoded],
+                {"image_size_mb": image_size_mb, "total_megapixels": total_megapixels},
+            )
 
-        if not sample:
-            raise RuntimeError(f"BFL API result is ready but no 'sample' field was found: {final_result}")
+        return (image_tensor, image_size_mb, total_megapixels)
 
-        img = self._sample_to_pil(sample).convert("RGB")
 
-        # Compute approximate output image size in megabytes using the selected format
-        buffer = io.BytesIO()
-        save_format = "PNG" if output_format.lower() == "png" else "JPEG"
-        img.save(buffer, format=save_format)
-        size_bytes = buffer.tell()
-        output_image_size_mb = float(size_bytes) / (1024.0 * 1024.0)
+class FLUXImageGeneratorOnlineAsync(FLUXImageGeneratorOnline):
+    """
+    FLUXImageGeneratorOnline as a native async node. The job itself still runs
+    through the thread-based scheduler / single-flight / webhook machinery, but
+    off the event loop, so other async network nodes keep making progress while
+    this one waits on the API.
+    """
 
-        # Total size includes all input reference images plus output image
-        image_size_mb = total_input_size_mb + output_image_size_mb
+    FUNCTION = "generate_async"
 
-        # Total megapixels includes all input reference images plus output image
-        out_width, out_height = img.size
-        output_megapixels = float(out_width * out_height) / 1_000_000.0
-        total_megapixels = total_input_megapixels + output_megapixels
-
-        image_tensor = pil_to_tensor(img)
-
-        return (image_tensor, image_size_mb, total_megapixels)
+    async def generate_async(self, **kwargs):
+        return await asyncio.to_thread(self.generate, **kwargs)
@@ -0,0 +1,265 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import requests
+
+from .http_transport import HTTP_TRANSPORT, backoff_seconds, retryable
+from .metrics import METRICS
+from .util import interruptible_sleep
+
+try:
+    import fcntl
+except ImportError:  # Windows: limits are enforced per process only
+    fcntl = None
+
+
+# The scheduler only carries FLUX traffic; retries are attributed to that node
+METRICS_NODE = "FLUXImageGeneratorOnline"
+
+
+class _Slot:
+    def __init__(self, handle=None):
+        self.handle = handle
+
+
+class FluxJobScheduler:
+    """
+    Host-wide admission control for BFL jobs, keyed by API key.
+
+    - At most max_active jobs per key are active at once. Slots are flock'ed
+      files under state_dir, so every ComfyUI worker on the host shares them
+      and a crashed worker releases its slots automatically.
+    - Job submissions draw from a token bucket (rate_per_s, burst) whose state
+      is also kept under state_dir.
+    - Jobs that cannot get a slot or a token wait in line instead of failing.
+    - request() retries 429 and 5xx responses with exponential backoff and
+      honours Retry-After. Job submissions (POST) are billable, so they are
+      only retried on 429 or when the connection was never made.
+
+    Without fcntl (or state_dir) the same limits apply within the process only.
+    """
+
+    def __init__(self, state_dir, max_active=24, rate_per_s=5.0, burst=10, max_retries=5):
+        self.state_dir = state_dir if (state_dir and fcntl is not None) else None
+        self.max_active = max(int(max_active), 1)
+        self.rate_per_s = float(rate_per_s)
+        self.burst = max(float(burst), 1.0)
+        self.max_retries = max(int(max_retries), 0)
+
+        self._lock = threading.Lock()
+        self._local_active = {}
+        self._local_bucket = {}
+        self._stats = {
+            "queued": 0,
+            "active": 0,
+            "jobs": 0,
+            "retries": 0,
+            "total_wait_s": 0.0,
+            "max_wait_s": 0.0,
+            "last_wait_s": 0.0,
+        }
+
+    def _key_dir(self, api_key):
+        # Never put the key itself on disk
+        digest = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+        path = os.path.join(self.state_dir, digest)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def acquire(self, api_key):
+        """Block until a slot and a submission token are available; return a slot handle."""
+        queued_since = self.enqueue(1)
+        try:
+            slot = self._acquire_slot(api_key)
+            try:
+                self._take_token(api_key)
+            except BaseException:
+                self._release_slot(api_key, slot)
+                raise
+        except BaseException:
+            self.dequeue(1)
+            raise
+        self._admitted(queued_since)
+        return slot
+
+    def try_acquire(self, api_key, queued_since=None):
+        """Non-blocking acquire for callers that keep their own queue (see enqueue)."""
+        slot = self._try_slot(api_key)
+        if slot is None:
+            return None
+        if self._try_token(api_key) > 0:
+            self._release_slot(api_key, slot)
+            return None
+        if queued_since is not None:
+            self._admitted(queued_since)
+        else:
+            with self._lock:
+                self._stats["active"] += 1
+                self._stats["jobs"] += 1
+        return slot
+
+    def enqueue(self, count):
+        """Count jobs as waiting; returns the timestamp to pass back on admission."""
+        with self._lock:
+            self._stats["queued"] += count
+        return time.time()
+
+    def dequeue(self, count):
+        with self._lock:
+            self._stats["queued"] = max(self._stats["queued"] - count, 0)
+
+    def _admitted(self, queued_since):
+        waited = time.time() - queued_since
+        with self._lock:
+            self._stats["queued"] = max(self._stats["queued"] - 1, 0)
+            self._stats["active"] += 1
+            self._stats["jobs"] += 1
+            self._stats["total_wait_s"] += waited
+            self._stats["last_wait_s"] = waited
+            self._stats["max_wait_s"] = max(self._stats["max_wait_s"], waited)
+            queued = self._stats["queued"]
+        if waited > 1.0:
+            print(f"FluxJobScheduler: job waited {waited:.1f}s for a slot (queue depth {queued})")
+
+    def release(self, api_key, slot):
+        if slot is None:
+            return
+        self._release_slot(api_key, slot)
+        with self._lock:
+            self._stats["active"] -= 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["avg_wait_s"] = stats["total_wait_s"] / stats["jobs"] if stats["jobs"] else 0.0
+        return stats
+
+    def request(self, method, url, **kwargs):
+        """HTTP_TRANSPORT.request with paced retries; returns the last response.
+
+        Idempotent requests (the polls) are retried on connection errors and
+        429/5xx. Other methods are retried only on 429 and on connect errors,
+        so a submission the API may already have accepted is never repeated.
+        """
+        attempt = 0
+        while True:
+            try:
+                # Same policy as the transport (retryable), but counted and paced per job here
+                resp = HTTP_TRANSPORT.request(method, url, retries=0, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries or not retryable(method, exc=e):
+                    raise
+                resp = None
+
+            if resp is not None and (attempt >= self.max_retries or not retryable(method, resp=resp)):
+                return resp
+
+            delay = backoff_seconds(attempt, resp)
+            if resp is not None:
+                resp.close()
+            attempt += 1
+            with self._lock:
+                self._stats["retries"] += 1
+            METRICS.inc("retries", METRICS_NODE)
+            interruptible_sleep(delay)
+
+    def _acquire_slot(self, api_key):
+        delay = 0.05
+        while True:
+            slot = self._try_slot(api_key)
+            if slot is not None:
+                return slot
+            interruptible_sleep(delay)
+            delay = min(delay * 2.0, 1.0)
+
+    def _try_slot(self, api_key):
+        if self.state_dir is None:
+            with self._lock:
+                active = self._local_active.get(api_key, 0)
+                if active >= self.max_active:
+                    return None
+                self._local_active[api_key] = active + 1
+            return _Slot()
+
+        key_dir = self._key_dir(api_key)
+        for i in range(self.max_active):
+            handle = open(os.path.join(key_dir, f"slot-{i}.lock"), "a+")
+            try:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                handle.close()
+                continue
+            return _Slot(handle)
+        return None
+
+    def _release_slot(self, api_key, slot):
+        if slot.handle is None:
+            with self._lock:
+                self._local_active[api_key] = max(self._local_active.get(api_key, 1) - 1, 0)
+            return
+        try:
+            fcntl.flock(slot.handle.fileno(), fcntl.LOCK_UN)
+        finally:
+            slot.handle.close()
+
+    def _take_token(self, api_key):
+        while True:
+            wait = self._try_token(api_key)
+            if wait <= 0:
+                return
+            interruptible_sleep(wait)
+
+    def _try_token(self, api_key):
+        """Take one token if available; otherwise return seconds until one will be."""
+        if self.rate_per_s <= 0:
+            return 0.0
+        now = time.time()
+
+        if self.state_dir is None:
+            with self._lock:
+                tokens, ts = self._local_bucket.get(api_key, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - ts) * self.rate_per_s)
+                if tokens >= 1.0:
+                    self._local_bucket[api_key] = (tokens - 1.0, now)
+                    return 0.0
+                self._local_bucket[api_key] = (tokens, now)
+                return (1.0 - tokens) / self.rate_per_s
+
+        path = os.path.join(self._key_dir(api_key), "bucket.json")
+        with open(path, "a+") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or "{}")
+                except ValueError:
+                    state = {}
+                tokens = float(state.get("tokens", self.burst))
+                ts = float(state.get("ts", now))
+                tokens = min(self.burst, tokens + max(now - ts, 0.0) * self.rate_per_s)
+                wait = 0.0
+                if tokens >= 1.0:
+                    tokens -= 1.0
+                else:
+                    wait = (1.0 - tokens) / self.rate_per_s
+                f.seek(0)
+                f.truncate()
+                json.dump({"tokens": tokens, "ts": now}, f)
+                f.flush()
+                return wait
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+FLUX_SCHEDULER = FluxJobScheduler(
+    os.getenv("TFI_FLUX_SCHEDULER_DIR", os.path.join(tempfile.gettempdir(), "tfi-flux-scheduler")),
+    max_active=int(os.getenv("TFI_FLUX_MAX_ACTIVE", "24")),
+    rate_per_s=float(os.getenv("TFI_FLUX_RATE_PER_S", "5")),
+    burst=float(os.getenv("TFI_FLUX_BURST", "10")),
+    max_retries=int(os.getenv("TFI_FLUX_MAX_RETRIES", "5")),
+)
+METRICS.add_collector(lambda: ("flux_scheduler", FLUX_SCHEDULER.stats()))
@@ -0,0 +1,131 @@
+import json
+import os
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FluxWebhookListener:
+    """
+    Local HTTP endpoint that receives BFL completion callbacks.
+
+    Waiting nodes block on wait_any() and are woken as soon as a callback for
+    one of their task ids arrives. Callbacks that arrive before anybody waits
+    are kept for a while so a fast job cannot be missed.
+    """
+
+    COMPLETED_TTL_S = 3600
+
+    def __init__(self, host, port, public_url=""):
+        self.host = host
+        self.port = int(port)
+        self.public_url = public_url.rstrip("/")
+        self.token = secrets.token_urlsafe(16)
+        self._server = None
+        self._thread = None
+        self._failed = False
+        self._start_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._completed = {}
+
+    def ensure_started(self):
+        """Start the listener once; return False if it cannot be started."""
+        with self._start_lock:
+            if self._server is not None:
+                return True
+            if self._failed:
+                return False
+            if not self.public_url:
+                # BFL has to reach us; without a public URL callbacks would never arrive.
+                print("FluxWebhookListener: TFI_FLUX_WEBHOOK_PUBLIC_URL is not set, using polling")
+                self._failed = True
+                return False
+            try:
+                self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+            except OSError as e:
+                print(f"FluxWebhookListener: cannot listen on {self.host}:{self.port}: {e}")
+                self._failed = True
+                return False
+            self._server.daemon_threads = True
+            self.port = self._server.server_address[1]
+            self._thread = threading.Thread(
+                target=self._server.serve_forever, name="tfi-flux-webhook", daemon=True
+            )
+            self._thread.start()
+            return True
+
+    def stop(self):
+        with self._start_lock:
+            if self._server is not None:
+                self._server.shutdown()
+                self._server.server_close()
+                self._server = None
+                self._thread = None
+
+    def callback_url(self):
+        return f"{self.public_url}/flux/callback/{self.token}"
+
+    def notify(self, task_id, payload=None):
+        with self._cond:
+            self._completed[str(task_id)] = (time.time(), payload)
+            self._prune()
+            self._cond.notify_all()
+
+    def wait_any(self, task_ids, timeout):
+        """Wait until a callback for any of task_ids arrived; return the ids that did."""
+        ids = {str(t) for t in task_ids if t}
+        deadline = time.time() + max(timeout, 0)
+        with self._cond:
+            while True:
+                done = ids.intersection(self._completed)
+                if done:
+                    return done
+                remaining = deadline - time.time()
+                if remaining <= 0 or not ids:
+                    return set()
+                self._cond.wait(remaining)
+
+    def forget(self, task_id):
+        with self._cond:
+            self._completed.pop(str(task_id), None)
+
+    def _prune(self):
+        cutoff = time.time() - self.COMPLETED_TTL_S
+        for key in [k for k, (ts, _) in self._completed.items() if ts < cutoff]:
+            del self._completed[key]
+
+    def _make_handler(self):
+        listener = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path.rstrip("/") != f"/flux/callback/{listener.token}":
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except Exception:
+                    self.send_response(400)
+                    self.end_headers()
+                    return
+
+                task_id = (payload.get("task_id") or payload.get("id")) if isinstance(payload, dict) else None
+                if task_id:
+                    listener.notify(task_id, payload)
+                self.send_response(200 if task_id else 400)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        return _Handler
+
+
+FLUX_WEBHOOK = FluxWebhookListener(
+    os.getenv("TFI_FLUX_WEBHOOK_HOST", "0.0.0.0"),
+    os.getenv("TFI_FLUX_WEBHOOK_PORT", "8189"),
+    os.getenv("TFI_FLUX_WEBHOOK_PUBLIC_URL", ""),
+)
@@ -0,0 +1,215 @@
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from .metrics import METRICS
+from .util import interruptible_sleep
+
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+METRICS_NODE = "HTTPTransport"
+
+
+def _verify_setting(value):
+    # "0" / "false" turn verification off; anything else but "1" / "true" is a CA bundle path
+    if value.lower() in ("0", "false", "no"):
+        return False
+    if value.lower() in ("", "1", "true", "yes"):
+        return True
+    return value
+
+
+def retry_after_seconds(resp):
+    """Parse a Retry-After header (seconds or HTTP date); 0.0 when absent."""
+    value = (resp.headers.get("Retry-After") or "").strip()
+    if not value:
+        return 0.0
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except Exception:
+        return 0.0
+
+
+def backoff_seconds(attempt, resp=None):
+    """Jittered exponential backoff, at least the response's Retry-After."""
+    delay = min(2.0 ** attempt, 30.0) * (0.5 + random.random() / 2.0)
+    if resp is not None:
+        delay = max(delay, retry_after_seconds(resp))
+    return delay
+
+
+def connect_failed(exc):
+    """True when a requests exception was raised before the request reached the server."""
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    # DNS failures and refused connections; a read timeout or reset may follow a sent request
+    return isinstance(reason, NewConnectionError)
+
+
+def retryable(method, resp=None, exc=None):
+    """Whether an attempt that failed with resp or exc may be repeated safely.
+
+    Idempotent methods retry on any connection error and on RETRY_STATUSES.
+    Others (a POST may already have been acted on) only on 429 and on
+    connect errors, where the server never saw the request.
+    """
+    if method.upper() in IDEMPOTENT_METHODS:
+        return exc is not None or resp.status_code in RETRY_STATUSES
+    if exc is not None:
+        return connect_failed(exc)
+    return resp.status_code == 429
+
+
+def _body_length(body):
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        return len(body)
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    return 0
+
+
+class HTTPTransport:
+    """
+    One pooled HTTP client for every TFI node.
+
+    - A single requests Session; urllib3 keeps a keep-alive pool per host,
+      so connections to the CDN and API hosts are reused across nodes and
+      prompts.
+    - At most max_per_host connections per host; further requests wait for
+      a free connection (streamed responses hold theirs until closed).
+    - TLS verification and timeouts are on unless a call overrides them.
+    - Idempotent requests are retried on connection errors and 429/5xx
+      with jittered backoff that honours Retry-After. Other methods are
+      only retried when retries= is passed, and then only as far as
+      retryable() allows (429 and failed connects); 0 disables retries.
+    - Requests, errors, retries and bytes are counted per host in METRICS,
+      and the time to response headers is observed as (HTTPTransport, host).
+    """
+
+    def __init__(self, timeout=(30, 120), verify=True, retries=2, max_per_host=16):
+        self.timeout = timeout
+        self.verify = verify
+        self.retries = max(int(retries), 0)
+        self.max_per_host = max(int(max_per_host), 1)
+        self._session = None
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=32, pool_maxsize=self.max_per_host, pool_block=True)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    def request(self, method, url, retries=None, **kwargs):
+        """requests.request through the shared pool; returns the last response."""
+        method = method.upper()
+        if retries is None:
+            retries = self.retries if method in IDEMPOTENT_METHODS else 0
+        kwargs.setdefault("timeout", self.timeout)
+        kwargs.setdefault("verify", self.verify)
+        host = urlparse(url).netloc
+
+        attempt = 0
+        while True:
+            try:
+                resp = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.count(host, "errors")
+                if attempt >= retries or not retryable(method, exc=e):
+                    raise
+                resp = None
+            else:
+                self._record(host, resp, kwargs.get("stream", False))
+
+            if resp is not None and (attempt >= retries or not retryable(method, resp=resp)):
+                return resp
+
+            delay = backoff_seconds(attempt, resp)
+            if resp is not None:
+                resp.close()
+            attempt += 1
+            self.count(host, "retries")
+            interruptible_sleep(delay)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.request("HEAD", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def _record(self, host, resp, stream):
+        if stream:
+            # The body has not been read yet; trust the declared length
+            bytes_in = int(resp.headers.get("Content-Length") or 0) if resp.request.method != "HEAD" else 0
+        else:
+            bytes_in = len(resp.content)
+        self.record(
+            host,
+            seconds=resp.elapsed.total_seconds(),
+            bytes_in=bytes_in,
+            bytes_out=_body_length(resp.request.body),
+            error=resp.status_code >= 400,
+        )
+
+    def record(self, host, seconds, bytes_in=0, bytes_out=0, error=False):
+        """Count one completed request (also used by the aiohttp client in async_http)."""
+        self.count(host, "requests")
+        if error:
+            self.count(host, "errors")
+        self.count(host, "bytes_in", bytes_in)
+        self.count(host, "bytes_out", bytes_out)
+        self.count(host, "seconds", seconds)
+        METRICS.observe(METRICS_NODE, host, seconds)
+
+    def count(self, host, name, amount=1):
+        if not amount:
+            return
+        with self._lock:
+            stats = self._stats.setdefault(host, {})
+            stats[name] = stats.get(name, 0) + amount
+        if name != "seconds":
+            METRICS.inc(name, METRICS_NODE, amount, host=host)
+
+    def stats(self):
+        """{host: {requests, errors, retries, bytes_in, bytes_out, seconds}} since start."""
+        with self._lock:
+            return {host: dict(values) for host, values in self._stats.items()}
+
+
+HTTP_TRANSPORT = HTTPTransport(
+    timeout=(
+        float(os.getenv("TFI_HTTP_CONNECT_TIMEOUT_S", "30")),
+        float(os.getenv("TFI_HTTP_READ_TIMEOUT_S", "120")),
+    ),
+    verify=_verify_setting(os.getenv("TFI_HTTP_VERIFY", "1")),
+    retries=int(os.getenv("TFI_HTTP_RETRIES", "2")),
+    max_per_host=int(os.getenv("TFI_HTTP_MAX_PER_HOST", "16")),
+)
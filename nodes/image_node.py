@@ -1,16 +1,27 @@
+import asyncio
+import io
 import os
-import tempfile
+import struct
 import subprocess
+import threading
+import time
+from collections import OrderedDict
 import numpy as np
 import torch
 from PIL import ImageOps, Image
 from urllib.parse import urlparse
 
-from .util import pil_to_tensor, read_image_from_url
+from .async_http import download_to_file, fetch_bytes
+from . import ranged_download
+from .download_cache import DOWNLOAD_CACHE
+from .http_transport import HTTP_TRANSPORT
+from .metrics import METRICS
+from .scratch import SCRATCH
+from .util import pil_to_tensor, pil_to_tensor_into, read_image_from_url, throw_if_interrupted
 
 
 VIDEO_EXTENSIONS = {".mp4", ".mov", ".mkv", ".webm", ".avi"}
-IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".bmp"}
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".gif", ".apng"}
 import shutil
 
 FFMPEG_PATH = shutil.which("ffmpeg") or "/opt/homebrew/bin/ffmpeg"
@@ -19,6 +30,20 @@ FFPROBE_PATH = shutil.which("ffprobe") or "/opt/homebrew/bin/ffprobe"
 if not FFMPEG_PATH:
     raise RuntimeError("ffmpeg not found in PATH")
 
+# Metrics label shared by the sync and async loaders
+METRICS_NODE = "LoadImageFromURL"
+
+# EXIF orientation -> transpose, as in ImageOps.exif_transpose
+ORIENTATION_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
 class LoadImageFromURL:
 
     @classmethod
@@ -27,6 +52,12 @@ class LoadImageFromURL:
             "required": {
                 "url": ("STRING", {"multiline": True, "default": "", "dynamicPrompts": False}),
             },
+            "optional": {
+                # Animated GIF / WebP / APNG: return every frame_stride-th frame as one batch
+                "all_frames": ("BOOLEAN", {"default": False}),
+                "frame_stride": ("INT", {"default": 1, "min": 1, "max": 1000, "step": 1}),
+                "max_frames": ("INT", {"default": 0, "min": 0, "max": 10000, "step": 1}),
+            },
         }
 
     RETURN_TYPES = ("IMAGE", "MASK")
@@ -42,22 +73,22 @@ class LoadImageFromURL:
         return ext.lower()
 
     def _download_temp_video(self, url: str):
-        import requests
-
-        tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".mp4")
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
+        # Large videos come down as parallel ranges when the server allows it
+        remote = ranged_download.probe(url)
+        tmp_path = SCRATCH.mkstemp(".mp4", expected_bytes=remote.size)
+        try:
+            ranged_download.download(url, tmp_path, remote=remote)
+        except BaseException:
+            SCRATCH.release(tmp_path)
+            raise
 
-        for chunk in response.iter_content(chunk_size=8192):
-            tmp_file.write(chunk)
-
-        tmp_file.close()
-        return tmp_file.name
+        return tmp_path
 
     def _extract_last_frame_ffmpeg(self, video_path: str):
-        temp_image = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-        temp_image.close()
+        with SCRATCH.temp(".png") as frame_path:
+            return self._extract_frame_to(video_path, frame_path)
 
+    def _extract_frame_to(self, video_path: str, frame_path: str):
         # Step 1: get duration
         result = subprocess.run(
             [FFPROBE_PATH, "-v", "error",
@@ -79,44 +110,110 @@ class LoadImageFromURL:
             "-ss", str(seek_time),
             "-i", video_path,
             "-frames:v", "1",
-            temp_image.name
+            frame_path
         ]
 
         subprocess.run(cmd, check=True)
 
         # Step 3: validate file size
-        if os.path.getsize(temp_image.name) == 0:
+        if os.path.getsize(frame_path) == 0:
             raise RuntimeError("FFmpeg produced empty frame.")
 
-        img = Image.open(temp_image.name).convert("RGB")
-        os.remove(temp_image.name)
-
-        return img
-
-    def convert(self, url):
-        image = None
-        mask = None
+        return Image.open(frame_path).convert("RGB")
 
+    def convert(self, url, all_frames=False, frame_stride=1, max_frames=0):
         url = url.strip()
         if not url:
             return (None, None)
 
         ext = self._get_extension(url)
 
-        if ext in VIDEO_EXTENSIONS:
-            video_path = self._download_temp_video(url)
+        if ext not in VIDEO_EXTENSIONS and ext not in IMAGE_EXTENSIONS:
+            raise ValueError(f"Unsupported file extension: {ext}")
+
+        cached_path = self._cached_path(url)
+
+        if ext in VIDEO_EXTENSIONS and cached_path:
+            with METRICS.timer(METRICS_NODE, "extract_frame"):
+                img = self._extract_last_frame_ffmpeg(cached_path)
+
+        elif ext in VIDEO_EXTENSIONS:
+            with METRICS.timer(METRICS_NODE, "download"):
+                video_path = self._download_temp_video(url)
             try:
-                img = self._extract_last_frame_ffmpeg(video_path)
+                METRICS.inc("bytes_in", METRICS_NODE, os.path.getsize(video_path))
+                with METRICS.timer(METRICS_NODE, "extract_frame"):
+                    img = self._extract_last_frame_ffmpeg(video_path)
             finally:
-                if os.path.exists(video_path):
-                    os.remove(video_path)
+                SCRATCH.release(video_path)
 
-        elif ext in IMAGE_EXTENSIONS:
-            img = read_image_from_url(url)
+        elif cached_path:
+            img = self._open_file(cached_path)
 
         else:
-            raise ValueError(f"Unsupported file extension: {ext}")
+            with METRICS.timer(METRICS_NODE, "download"):
+                img, content = read_image_from_url(url, return_bytes=True)
+            METRICS.inc("bytes_in", METRICS_NODE, len(content or b""))
+
+        with METRICS.timer(METRICS_NODE, "decode"):
+            return self._decode(img, all_frames, frame_stride, max_frames)
+
+    def _cached_path(self, url):
+        """Local copy of url left by PrefetchURLs, if it is still current."""
+        # Plain loads (no PrefetchURLs upstream) never touch the cache
+        if not DOWNLOAD_CACHE.prefetched(url):
+            return None
+        path = DOWNLOAD_CACHE.get(url)
+        METRICS.inc("prefetch_hits" if path else "prefetch_misses", METRICS_NODE)
+        return path
+
+    def _open_file(self, path):
+        img = Image.open(path)
+        img.load()
+        return img
 
+    def _decode(self, img, all_frames=False, frame_stride=1, max_frames=0):
+        if all_frames and getattr(img, "n_frames", 1) > 1:
+            return self._frames_to_outputs(img, frame_stride, max_frames)
+        return self._to_outputs(img)
+
+    def _frames_to_outputs(self, img, frame_stride=1, max_frames=0):
+        """Decode the selected frames one by one into a preallocated [B, H, W, 3] batch."""
+        indices = range(0, img.n_frames, max(int(frame_stride), 1))
+        if max_frames > 0:
+            indices = indices[:max_frames]
+
+        # Orientation applies to the whole animation; frames are full-canvas in PIL
+        orientation = img.getexif().get(0x0112, 1)
+        width, height = img.size
+        if orientation in (5, 6, 7, 8):
+            width, height = height, width
+
+        image = torch.empty((len(indices), height, width, 3), dtype=torch.float32)
+        mask = None
+        for i, index in enumerate(indices):
+            throw_if_interrupted()
+            img.seek(index)
+            has_alpha = "A" in img.getbands() or "transparency" in img.info
+            frame = img.convert("RGBA" if has_alpha else "RGB")
+            if orientation in ORIENTATION_TRANSPOSE:
+                frame = frame.transpose(ORIENTATION_TRANSPOSE[orientation])
+            if frame.size != (width, height):
+                raise RuntimeError(f"Frame {index} is {frame.size}, expected {(width, height)}")
+
+            pil_to_tensor_into(frame.convert("RGB") if has_alpha else frame, image[i])
+            if has_alpha:
+                if mask is None:
+                    # Frames without alpha stay fully opaque (mask 0)
+                    mask = torch.zeros((len(indices), height, width), dtype=torch.float32)
+                alpha = torch.from_numpy(np.array(frame.getchannel("A"), dtype=np.uint8))
+                mask[i] = 1.0 - alpha.float() / 255.0
+
+        if mask is None:
+            mask = torch.zeros((len(indices), 64, 64), dtype=torch.float32, device="cpu")
+        return (image, mask)
+
+    def _to_outputs(self, img):
         # common processing
         img = ImageOps.exif_transpose(img)
 
@@ -131,4 +228,232 @@ class LoadImageFromURL:
         else:
             mask = torch.zeros((64, 64), dtype=torch.float32, device="cpu")
 
-        return (image, mask)
\ No newline at end of file
+        return (image, mask)
+
+
+class LoadImageFromURLAsync(LoadImageFromURL):
+    """
+    LoadImageFromURL as a native async node: the download goes through the
+    shared pooled aiohttp session and decoding runs in a worker thread, so
+    independent loaders in one graph overlap their network time.
+    """
+
+    FUNCTION = "convert_async"
+
+    async def convert_async(self, url, all_frames=False, frame_stride=1, max_frames=0):
+        url = url.strip()
+        if not url:
+            return (None, None)
+
+        ext = self._get_extension(url)
+        if ext not in VIDEO_EXTENSIONS and ext not in IMAGE_EXTENSIONS:
+            raise ValueError(f"Unsupported file extension: {ext}")
+
+        # The revalidation HEAD (and any wait for a running prefetch) blocks
+        cached_path = await asyncio.to_thread(self._cached_path, url)
+
+        if ext in VIDEO_EXTENSIONS and cached_path:
+            with METRICS.timer(METRICS_NODE, "extract_frame"):
+                img = await asyncio.to_thread(self._extract_last_frame_ffmpeg, cached_path)
+
+        elif ext in VIDEO_EXTENSIONS:
+            with SCRATCH.temp(".mp4") as tmp_path:
+                with METRICS.timer(METRICS_NODE, "download"):
+                    await download_to_file(url, tmp_path)
+                METRICS.inc("bytes_in", METRICS_NODE, os.path.getsize(tmp_path))
+                with METRICS.timer(METRICS_NODE, "extract_frame"):
+                    img = await asyncio.to_thread(self._extract_last_frame_ffmpeg, tmp_path)
+
+        elif cached_path:
+            img = await asyncio.to_thread(self._open_file, cached_path)
+
+        else:
+            with METRICS.timer(METRICS_NODE, "download"):
+                data = await fetch_bytes(url)
+            METRICS.inc("bytes_in", METRICS_NODE, len(data))
+            img = await asyncio.to_thread(self._open_image, data)
+
+        with METRICS.timer(METRICS_NODE, "decode"):
+            return await asyncio.to_thread(self._decode, img, all_frames, frame_stride, max_frames)
+
+    def _open_image(self, data):
+        img = Image.open(io.BytesIO(data))
+        img.load()
+        return img
+
+
+# Header bytes requested first; grown up to IMAGE_INFO_MAX_BYTES for large EXIF blocks
+IMAGE_INFO_INITIAL_BYTES = 64 * 1024
+IMAGE_INFO_MAX_BYTES = 1024 * 1024
+IMAGE_INFO_CACHE_SIZE = 1024
+# Cached results are re-read after this long, in case the object behind the URL changed
+IMAGE_INFO_TTL_S = float(os.getenv("TFI_IMAGE_INFO_TTL_S", "3600"))
+EXIF_ORIENTATION = 0x0112
+# Chunk headers followed while looking for a WebP EXIF chunk (ICCP, ANIM, ALPH, VP8 ... EXIF)
+WEBP_MAX_CHUNKS = 8
+
+_image_info_cache = OrderedDict()
+_image_info_lock = threading.Lock()
+
+
+class ImageInfoFromURL:
+    """
+    Width, height, format, mode and EXIF orientation of a remote image,
+    read from the first few KB with a Range request. No pixels are decoded.
+    width / height are as displayed, i.e. after the EXIF rotation that
+    LoadImageFromURL applies. Results are cached by URL for
+    IMAGE_INFO_TTL_S seconds.
+    """
+
+    @classmethod
+    def INPUT_TYPES(self):
+        return {
+            "required": {
+                "url": ("STRING", {"multiline": False, "default": "", "dynamicPrompts": False}),
+            },
+        }
+
+    RETURN_TYPES = ("INT", "INT", "STRING", "STRING", "INT")
+    RETURN_NAMES = ("width", "height", "format", "mode", "orientation")
+    FUNCTION = "info"
+    CATEGORY = "TFI/Image"
+
+    def info(self, url):
+        url = url.strip()
+        if not url:
+            raise ValueError("No image URL provided")
+
+        now = time.time()
+        with _image_info_lock:
+            cached = _image_info_cache.get(url)
+            if cached is not None and now - cached[1] >= IMAGE_INFO_TTL_S:
+                del _image_info_cache[url]
+                cached = None
+            if cached is not None:
+                _image_info_cache.move_to_end(url)
+        if cached is not None:
+            METRICS.inc("cache_hits", "ImageInfoFromURL")
+            return cached[0]
+
+        METRICS.inc("cache_misses", "ImageInfoFromURL")
+        with METRICS.timer("ImageInfoFromURL", "probe"):
+            result = self._read_info(url)
+
+        with _image_info_lock:
+            _image_info_cache[url] = (result, now)
+            _image_info_cache.move_to_end(url)
+            while len(_image_info_cache) > IMAGE_INFO_CACHE_SIZE:
+                _image_info_cache.popitem(last=False)
+        return result
+
+    def _read_info(self, url):
+        want = IMAGE_INFO_INITIAL_BYTES
+        while True:
+            with HTTP_TRANSPORT.get(url, headers={"Range": f"bytes=0-{want - 1}"}, stream=True) as resp:
+                resp.raise_for_status()
+                # Servers that ignore Range send everything; read only what we asked for
+                head = resp.raw.read(want, decode_content=True)
+                complete = resp.status_code == 200 and len(head) < want
+                if resp.status_code == 206:
+                    total = resp.headers.get("Content-Range", "").rpartition("/")[2]
+                    complete = total.isdigit() and len(head) >= int(total)
+            METRICS.inc("bytes_in", "ImageInfoFromURL", len(head))
+
+            if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+                # Pillow only opens a WebP from the whole file; the size is in the first chunk
+                return self._read_webp_info(url, head)
+            try:
+                return self._parse_header(head)
+            except (OSError, SyntaxError, ValueError, EOFError):
+                # Header (e.g. a large EXIF block) did not fit; ask for more
+                if complete or want >= IMAGE_INFO_MAX_BYTES:
+                    raise ValueError(f"Could not read image header from {url}")
+                want = min(want * 4, IMAGE_INFO_MAX_BYTES)
+
+    def _parse_header(self, head):
+        # Image.open only parses headers; pixel data is never decoded here
+        with Image.open(io.BytesIO(head)) as img:
+            width, height = img.size
+            # img.getexif() would load the pixels for PNG; parse the raw block instead
+            exif = Image.Exif()
+            if img.info.get("exif"):
+                exif.load(img.info["exif"])
+            elif hasattr(img, "tag_v2"):
+                exif.update(img.tag_v2)
+            orientation = int(exif.get(EXIF_ORIENTATION, 1) or 1)
+            fmt, mode = img.format or "", img.mode
+
+        # Rotated by 90 / 270 degrees when displayed (PIL already reports TIFF sizes rotated)
+        if orientation in (5, 6, 7, 8) and fmt != "TIFF":
+            width, height = height, width
+        return (width, height, fmt, mode, orientation)
+
+    def _read_webp_info(self, url, head):
+        width, height, mode, has_exif = parse_webp_header(head)
+        orientation = 1
+        if has_exif:
+            exif_data = self._read_webp_exif(url, head)
+            if exif_data:
+                exif = Image.Exif()
+                exif.load(exif_data)
+                orientation = int(exif.get(EXIF_ORIENTATION, 1) or 1)
+        if orientation in (5, 6, 7, 8):
+            width, height = height, width
+        return (width, height, "WEBP", mode, orientation)
+
+    def _read_range(self, url, start, length):
+        with HTTP_TRANSPORT.get(url, headers={"Range": f"bytes={start}-{start + length - 1}"}, stream=True) as resp:
+            resp.raise_for_status()
+            if resp.status_code != 206:
+                return b""
+            data = resp.raw.read(length, decode_content=True)
+        METRICS.inc("bytes_in", "ImageInfoFromURL", len(data))
+        return data
+
+    def _read_webp_exif(self, url, head):
+        """EXIF chunk of an extended WebP; it follows the image data, so walk the chunk headers."""
+        offset = 12
+        for _ in range(WEBP_MAX_CHUNKS):
+            header = head[offset:offset + 8] if offset + 8 <= len(head) else self._read_range(url, offset, 8)
+            if len(header) < 8:
+                return None
+            fourcc, size = header[:4], struct.unpack("<I", header[4:8])[0]
+            if fourcc == b"EXIF":
+                start = offset + 8
+                if start + size <= len(head):
+                    return head[start:start + size]
+                return self._read_range(url, start, min(size, IMAGE_INFO_MAX_BYTES))
+            offset += 8 + size + (size & 1)
+        return None
+
+    @classmethod
+    def IS_CHANGED(cls, url):
+        # Changes once per TTL window, so ComfyUI re-runs the node when its cached result may have expired
+        return f"{url.strip()}@{int(time.time() // IMAGE_INFO_TTL_S) if IMAGE_INFO_TTL_S > 0 else 0}"
+
+
+def parse_webp_header(head):
+    """(width, height, mode, has_exif) from the first 30 bytes of a WebP file."""
+    if len(head) < 30 or head[:4] != b"RIFF" or head[8:12] != b"WEBP":
+        raise ValueError("Not a WebP header")
+    chunk, data = head[12:16], head[20:30]
+    if chunk == b"VP8 ":
+        # Lossy: 3-byte frame tag, start code 9d 01 2a, then 14-bit width and height
+        if data[3:6] != b"\x9d\x01\x2a":
+            raise ValueError("Invalid VP8 frame header")
+        width, height = struct.unpack("<HH", data[6:10])
+        return width & 0x3FFF, height & 0x3FFF, "RGB", False
+    if chunk == b"VP8L":
+        # Lossless: signature 0x2f, then 14-bit width-1, 14-bit height-1 and an alpha bit
+        if data[0] != 0x2F:
+            raise ValueError("Invalid VP8L header")
+        bits = struct.unpack("<I", data[1:5])[0]
+        alpha = (bits >> 28) & 1
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1, "RGBA" if alpha else "RGB", False
+    if chunk == b"VP8X":
+        # Extended: flags byte, 3 reserved bytes, then 24-bit canvas width-1 and height-1
+        flags = data[0]
+        width = int.from_bytes(data[4:7], "little") + 1
+        height = int.from_bytes(data[7:10], "little") + 1
+        return width, height, "RGBA" if flags & 0x10 else "RGB", bool(flags & 0x08)
+    raise ValueError(f"Unknown WebP chunk {chunk!r}")
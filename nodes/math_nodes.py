@@ -1,3 +1,42 @@
+import math
+
+import numpy as np
+import torch
+
+
+# The math nodes accept scalars as before, and also lists / NumPy arrays / torch
+# tensors (e.g. per-frame schedules). Non-scalar inputs are computed elementwise
+# with broadcasting in one vectorized call and returned in the input's container
+# type (tensor > ndarray > list/tuple when mixed).
+def _vectorize(*values):
+    """Return (xp, arrays, like) when any value is non-scalar, else None."""
+    like = None
+    for kind in (torch.Tensor, np.ndarray, (list, tuple)):
+        like = next((v for v in values if isinstance(v, kind)), None)
+        if like is not None:
+            break
+    if like is None:
+        return None
+
+    if isinstance(like, torch.Tensor):
+        dtype = like.dtype if like.is_floating_point() else torch.float32
+        arrays = [torch.as_tensor(v, dtype=dtype, device=like.device) for v in values]
+        return torch, arrays, like
+    return np, [np.asarray(v, dtype=np.float64) for v in values], like
+
+
+def _wrap(result, like):
+    if isinstance(like, (torch.Tensor, np.ndarray)):
+        return result
+    if isinstance(like, tuple):
+        return tuple(result.tolist())
+    return result.tolist()
+
+
+def _to_int(xp, result):
+    return result.to(torch.int64) if xp is torch else result.astype(np.int64)
+
+
 class AddNode:
     @classmethod
     def INPUT_TYPES(cls):
@@ -14,7 +53,11 @@ class AddNode:
     CATEGORY = "TFI/Math"
 
     def compute(self, a, b):
-        return (float(a) + float(b),)
+        vec = _vectorize(a, b)
+        if vec is None:
+            return (float(a) + float(b),)
+        _, (a, b), like = vec
+        return (_wrap(a + b, like),)
 
 
 class SubtractNode:
@@ -33,7 +76,11 @@ class SubtractNode:
     CATEGORY = "TFI/Math"
 
     def compute(self, a, b):
-        return (float(a) - float(b),)
+        vec = _vectorize(a, b)
+        if vec is None:
+            return (float(a) - float(b),)
+        _, (a, b), like = vec
+        return (_wrap(a - b, like),)
 
 
 class MultiplyNode:
@@ -52,7 +99,11 @@ class MultiplyNode:
     CATEGORY = "TFI/Math"
 
     def compute(self, a, b):
-        return (float(a) * float(b),)
+        vec = _vectorize(a, b)
+        if vec is None:
+            return (float(a) * float(b),)
+        _, (a, b), like = vec
+        return (_wrap(a * b, like),)
 
 
 class DivideNode:
@@ -71,10 +122,18 @@ class DivideNode:
     CATEGORY = "TFI/Math"
 
     def compute(self, a, b):
-        b = float(b)
-        if b == 0:
-            return (0.0,)
-        return (float(a) / b,)
+        vec = _vectorize(a, b)
+        if vec is None:
+            b = float(b)
+            if b == 0:
+                return (0.0,)
+            return (float(a) / b,)
+
+        # Same policy elementwise: division by zero yields 0
+        xp, (a, b), like = vec
+        zero = b == 0
+        quotient = a / xp.where(zero, xp.ones_like(b), b)
+        return (_wrap(xp.where(zero, xp.zeros_like(quotient), quotient), like),)
 
 
 class ClampNode:
@@ -93,13 +152,21 @@ class ClampNode:
     FUNCTION = "compute"
     CATEGORY = "TFI/Math"
 
-    def compute(self, value, min, max):
-        v = float(value)
-        lo = float(min)
-        hi = float(max)
-        if lo > hi:
-            lo, hi = hi, lo
-        return (max(lo, min(v, hi)),)
+    def compute(self, value, **bounds):
+        # "min" / "max" are the input names, so take them as kwargs to keep the builtins usable
+        lo, hi = bounds["min"], bounds["max"]
+        vec = _vectorize(value, lo, hi)
+        if vec is None:
+            v = float(value)
+            lo = float(lo)
+            hi = float(hi)
+            if lo > hi:
+                lo, hi = hi, lo
+            return (max(lo, min(v, hi)),)
+
+        xp, (v, lo, hi), like = vec
+        lo, hi = xp.minimum(lo, hi), xp.maximum(lo, hi)
+        return (_wrap(xp.minimum(xp.maximum(v, lo), hi), like),)
 
 
 class FloorNode:
@@ -117,8 +184,11 @@ class FloorNode:
     CATEGORY = "TFI/Math"
 
     def compute(self, value):
-        import math
-        return (int(math.floor(float(value))),)
+        vec = _vectorize(value)
+        if vec is None:
+            return (int(math.floor(float(value))),)
+        xp, (v,), like = vec
+        return (_wrap(_to_int(xp, xp.floor(v)), like),)
 
 
 class CeilNode:
@@ -136,5 +206,8 @@ class CeilNode:
     CATEGORY = "TFI/Math"
 
     def compute(self, value):
-        import math
-        return (int(math.ceil(float(value))),)
+        vec = _vectorize(value)
+        if vec is None:
+            return (int(math.ceil(float(value))),)
+        xp, (v,), like = vec
+        return (_wrap(_to_int(xp, xp.ceil(v)), like),)
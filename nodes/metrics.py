@@ -0,0 +1,207 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Phase duration buckets in seconds (Prometheus "le" bounds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+COUNTER_HELP = {
+    "bytes_in": "Bytes downloaded or received by the node",
+    "bytes_out": "Bytes uploaded or sent by the node",
+    "cache_hits": "Results served from a cache",
+    "cache_misses": "Cache lookups that had to do the work",
+    "retries": "HTTP requests retried after a 429/5xx or connection error",
+    "polls": "Status polls against a remote job API",
+    "errors": "Phases that ended with an exception",
+    "prefetch_hits": "Loads served from a prefetched local copy",
+    "prefetch_misses": "Loads that found no current prefetched copy",
+    "queued": "URLs queued for background prefetching",
+    "signed_urls": "CDN URLs signed",
+    "requests": "HTTP requests answered, per host",
+}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Metrics:
+    """
+    In-process counters and per-(node, phase) duration histograms.
+
+    Recording is a dict update under one lock, so it can stay on in
+    production. The registry is exposed in the Prometheus text format via
+    render(), a periodically rewritten file (TFI_METRICS_FILE) and/or a local
+    HTTP endpoint (TFI_METRICS_PORT, GET /metrics). Set TFI_METRICS=0 to turn
+    recording off entirely.
+    """
+
+    def __init__(self, enabled=True, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+        self._server = None
+        self._writer = None
+
+    def inc(self, name, node, amount=1, **labels):
+        if not self.enabled or not amount:
+            return
+        key = (name, node, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, node, phase, seconds):
+        if not self.enabled:
+            return
+        idx = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            hist = self._histograms.get((node, phase))
+            if hist is None:
+                hist = self._histograms[(node, phase)] = _Histogram(len(self.buckets) + 1)
+            hist.counts[idx] += 1
+            hist.sum += seconds
+            hist.count += 1
+
+    @contextmanager
+    def timer(self, node, phase):
+        """Time a block as one observation of (node, phase); count it as an error if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc("errors", node, phase=phase)
+            raise
+        finally:
+            self.observe(node, phase, time.perf_counter() - start)
+
+    def add_collector(self, fn):
+        """Register fn() -> (prefix, {name: value}) to be exported as gauges at render time."""
+        self._collectors.append(fn)
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, (list(h.counts), h.sum, h.count)) for key, h in self._histograms.items()
+            )
+
+        lines = []
+        seen = set()
+        for (name, node, extra), value in counters:
+            metric = f"tfi_{name}_total"
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# HELP {metric} {COUNTER_HELP.get(name, name)}")
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_labels((('node', node),) + extra)} {value}")
+
+        if histograms:
+            lines.append("# HELP tfi_phase_seconds Time spent per node and phase")
+            lines.append("# TYPE tfi_phase_seconds histogram")
+        for (node, phase), (counts, total, count) in histograms:
+            base = (("node", node), ("phase", phase))
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f"tfi_phase_seconds_bucket{_labels(base + (('le', repr(bound)),))} {cumulative}")
+            lines.append(f"tfi_phase_seconds_bucket{_labels(base + (('le', '+Inf'),))} {count}")
+            lines.append(f"tfi_phase_seconds_sum{_labels(base)} {total}")
+            lines.append(f"tfi_phase_seconds_count{_labels(base)} {count}")
+
+        for fn in self._collectors:
+            try:
+                prefix, values = fn()
+            except Exception as e:
+                print(f"Metrics: collector failed: {e}")
+                continue
+            for name, value in sorted(values.items()):
+                metric = f"tfi_{prefix}_{name}"
+                lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric} {float(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path):
+        """Atomically write render() to path (node_exporter textfile collector format)."""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.render())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Metrics: cannot write {path}: {e}")
+
+    def start_file_writer(self, path, interval_s=15.0):
+        if self._writer is not None:
+            return
+
+        def loop():
+            while True:
+                self.write_file(path)
+                time.sleep(interval_s)
+
+        self._writer = threading.Thread(target=loop, name="tfi-metrics-file", daemon=True)
+        self._writer.start()
+
+    def start_http(self, host, port):
+        """Serve GET /metrics on host:port; return False if the port is unavailable."""
+        if self._server is not None:
+            return True
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((host, int(port)), Handler)
+        except OSError as e:
+            print(f"Metrics: cannot listen on {host}:{port}: {e}")
+            return False
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="tfi-metrics-http", daemon=True).start()
+        return True
+
+
+METRICS = Metrics(enabled=os.getenv("TFI_METRICS", "1") not in ("0", "false", "False", ""))
+
+if METRICS.enabled and os.getenv("TFI_METRICS_FILE"):
+    METRICS.start_file_writer(
+        os.getenv("TFI_METRICS_FILE"), float(os.getenv("TFI_METRICS_INTERVAL_S", "15"))
+    )
+if METRICS.enabled and os.getenv("TFI_METRICS_PORT"):
+    METRICS.start_http(os.getenv("TFI_METRICS_HOST", "127.0.0.1"), os.getenv("TFI_METRICS_PORT"))
@@ -0,0 +1,104 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from .audio_url_loader import AUDIO_EXTENSIONS, AudioURLLoader
+from .download_cache import DOWNLOAD_CACHE, is_inflight, prefetching, track_inflight
+from .image_node import IMAGE_EXTENSIONS, VIDEO_EXTENSIONS
+from .metrics import METRICS
+from .util import ignore_interrupts
+
+
+PREFETCH_CONCURRENCY = max(int(os.getenv("TFI_PREFETCH_CONCURRENCY", "4")), 1)
+METRICS_NODE = "PrefetchURLs"
+
+
+class Prefetcher:
+    """
+    Background pool that warms the caches the loaders read from: images and
+    videos land in DOWNLOAD_CACHE, audio is downloaded and decoded into
+    AUDIO_CACHE. A loader asking for a URL that is still being prefetched
+    waits for it instead of downloading it again.
+    """
+
+    def __init__(self, concurrency):
+        self.concurrency = concurrency
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self, concurrency):
+        with self._lock:
+            if self._executor is None or concurrency != self.concurrency:
+                if self._executor is not None:
+                    # Work already queued on the old pool still runs to completion
+                    self._executor.shutdown(wait=False)
+                self.concurrency = concurrency
+                self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="tfi-prefetch")
+            return self._executor
+
+    def submit(self, urls, concurrency=None):
+        """Queue urls for prefetching; return how many were queued (in-flight duplicates are skipped)."""
+        pool = self._pool(concurrency or self.concurrency)
+        queued = 0
+        for url in dict.fromkeys(urls):
+            if is_inflight(url):
+                continue
+            track_inflight(url, pool.submit(self._prefetch, url))
+            queued += 1
+        return queued
+
+    def _prefetch(self, url):
+        ext = os.path.splitext(urlparse(url).path)[1].lower()
+        try:
+            # A cancel belongs to the running prompt; checking it here would consume it
+            with prefetching(url), ignore_interrupts(), METRICS.timer(METRICS_NODE, "prefetch"):
+                if ext in AUDIO_EXTENSIONS:
+                    # Errors are printed by the loader; its decode lands in AUDIO_CACHE
+                    AudioURLLoader().load_audio(url)
+                elif ext in IMAGE_EXTENSIONS or ext in VIDEO_EXTENSIONS:
+                    path = DOWNLOAD_CACHE.fetch(url)
+                    METRICS.inc("bytes_in", METRICS_NODE, os.path.getsize(path))
+                else:
+                    print(f"PrefetchURLs: skipping {url}, unsupported file extension: {ext}")
+        except Exception as e:
+            print(f"PrefetchURLs: failed to prefetch {url}: {e}")
+
+
+PREFETCHER = Prefetcher(PREFETCH_CONCURRENCY)
+
+
+class PrefetchURLs:
+    """
+    Starts downloading image, video and audio URLs (one per line) in the
+    background and returns immediately, so later LoadImageFromURL and
+    AudioURLLoader nodes in this or later prompts find them locally.
+
+    Prefetched audio is used once as is by the next load. After that it is
+    revalidated with ETag / Last-Modified, so audio from a server that sends
+    neither is downloaded again by every later load.
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "urls": ("STRING", {"multiline": True, "default": "", "dynamicPrompts": False}),
+            },
+            "optional": {
+                "max_concurrency": ("INT", {"default": PREFETCH_CONCURRENCY, "min": 1, "max": 32, "step": 1}),
+            },
+        }
+
+    RETURN_TYPES = ("STRING",)
+    RETURN_NAMES = ("urls",)
+    FUNCTION = "prefetch"
+    CATEGORY = "TFI/utils"
+    OUTPUT_NODE = True
+
+    def prefetch(self, urls, max_concurrency=PREFETCH_CONCURRENCY):
+        url_list = [line.strip() for line in urls.splitlines() if line.strip()]
+        queued = PREFETCHER.submit(url_list, max_concurrency)
+        METRICS.inc("queued", METRICS_NODE, queued)
+        print(f"PrefetchURLs: queued {queued} of {len(url_list)} URL(s)")
+        return (urls,)
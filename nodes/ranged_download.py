@@ -0,0 +1,155 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from .http_transport import HTTP_TRANSPORT
+from .util import ignore_interrupts, interrupts_ignored, throw_if_interrupted
+
+
+# Files at least this large are fetched as parallel ranges when the server allows it
+RANGED_MIN_BYTES = int(float(os.getenv("TFI_RANGED_MIN_MB", "8")) * 1024 * 1024)
+RANGED_PARTS = max(int(os.getenv("TFI_RANGED_PARTS", "4")), 1)
+CHUNK_SIZE = 1024 * 1024
+
+
+class RemoteFile:
+    """Result of probe(): what a HEAD request told us about url."""
+
+    def __init__(self, url, status, headers):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.size = int(headers.get("Content-Length") or 0) if status == 200 else 0
+        self.accepts_ranges = (
+            status == 200
+            and headers.get("Accept-Ranges", "").lower() == "bytes"
+            # A compressed representation cannot be split by byte offsets
+            and not headers.get("Content-Encoding")
+        )
+
+    @property
+    def not_modified(self):
+        return self.status == 304
+
+
+def probe(url, headers=None):
+    """HEAD url (following redirects). Conditional headers are honoured, so a
+    cached copy can be revalidated without downloading anything.
+
+    Servers that reject HEAD yield a RemoteFile without range support.
+    """
+    try:
+        resp = HTTP_TRANSPORT.head(url, headers=headers, allow_redirects=True)
+    except requests.RequestException:
+        return RemoteFile(url, 0, {})
+    if resp.status_code not in (200, 304):
+        return RemoteFile(url, 0, {})
+    # Ranges go to the final location so every part skips the redirect
+    return RemoteFile(resp.url, resp.status_code, resp.headers)
+
+
+def download(url, path, headers=None, remote=None, parts=RANGED_PARTS, min_ranged_bytes=RANGED_MIN_BYTES):
+    """Download url into path; return (status, response headers).
+
+    Large files on servers that accept ranges are fetched as `parts`
+    concurrent Range requests written at their offsets into a preallocated
+    file; everything else is one streamed GET. With conditional headers a
+    304 is returned as-is and nothing is written. Pass the RemoteFile from
+    an earlier probe() to skip the HEAD request.
+    """
+    if remote is None:
+        remote = probe(url, headers)
+    if remote.not_modified:
+        return 304, remote.headers
+
+    if parts > 1 and remote.accepts_ranges and remote.size >= min_ranged_bytes:
+        try:
+            _download_ranges(remote, path, parts)
+            return 200, remote.headers
+        except _RangesUnsupported:
+            pass
+
+    return _download_stream(url, path, headers)
+
+
+class _RangesUnsupported(Exception):
+    pass
+
+
+def _preallocate(path, size):
+    with open(path, "wb") as f:
+        if hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(f.fileno(), 0, size)
+                return
+            except OSError:
+                pass
+        f.truncate(size)
+
+
+def _download_ranges(remote, path, parts):
+    size = remote.size
+    part_size = -(-size // parts)
+    ranges = [(start, min(start + part_size, size) - 1) for start in range(0, size, part_size)]
+    etag = remote.headers.get("ETag") or ""
+    # If-Range only accepts strong ETags
+    validator = etag if etag and not etag.startswith("W/") else remote.headers.get("Last-Modified")
+    stop = threading.Event()
+    # Parts run on pool threads; they follow the caller's interrupt setting
+    ignored = interrupts_ignored()
+
+    _preallocate(path, size)
+
+    def fetch(byte_range):
+        with ignore_interrupts(ignored):
+            fetch_part(byte_range)
+
+    def fetch_part(byte_range):
+        start, end = byte_range
+        range_headers = {"Range": f"bytes={start}-{end}"}
+        if validator:
+            # If the file changed since the HEAD the server sends 200 instead of 206
+            range_headers["If-Range"] = validator
+        with HTTP_TRANSPORT.get(remote.url, headers=range_headers, stream=True) as resp:
+            if resp.status_code != 206:
+                raise _RangesUnsupported()
+            with open(path, "r+b") as f:
+                fd = f.fileno()
+                offset = start
+                for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                    if stop.is_set():
+                        return
+                    throw_if_interrupted()
+                    if hasattr(os, "pwrite"):
+                        os.pwrite(fd, chunk, offset)
+                    else:
+                        f.seek(offset)
+                        f.write(chunk)
+                    offset += len(chunk)
+            if offset != end + 1:
+                raise IOError(f"Range {start}-{end} of {remote.url} ended after {offset - start} bytes")
+
+    with ThreadPoolExecutor(max_workers=len(ranges)) as pool:
+        futures = [pool.submit(fetch, r) for r in ranges]
+        try:
+            for future in futures:
+                future.result()
+        except BaseException:
+            # Let the other parts bail out at their next chunk
+            stop.set()
+            raise
+
+
+def _download_stream(url, path, headers=None):
+    with HTTP_TRANSPORT.get(url, headers=headers, stream=True) as resp:
+        if resp.status_code == 304:
+            return 304, resp.headers
+        resp.raise_for_status()
+        with open(path, "wb") as f:
+            for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                # Abort promptly when the prompt is cancelled
+                throw_if_interrupted()
+                f.write(chunk)
+        return resp.status_code, resp.headers
@@ -0,0 +1,107 @@
+import io
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageOps
+
+from .image_node import FFMPEG_PATH, IMAGE_EXTENSIONS, VIDEO_EXTENSIONS
+from .util import encode_image, tensor_to_pil
+
+
+# Renditions are encoded on this many threads; PIL releases the GIL while resizing and encoding
+ENCODE_WORKERS = max(int(os.getenv("TFI_RENDITION_WORKERS", "4")), 1)
+DEFAULT_QUALITY = 85
+RENDITION_FORMATS = {"jpg", "jpeg", "png", "webp"}
+
+
+class Rendition:
+    """One entry of a rendition spec: name:size:format[:quality].
+
+    size is the longest side in pixels ("256"), a height ("720p") or "0"
+    for the original size. Renditions are never upscaled.
+    """
+
+    def __init__(self, name, size, fmt, quality=DEFAULT_QUALITY):
+        self.name = name
+        self.by_height = size.lower().endswith("p")
+        self.size = int(size[:-1] if self.by_height else size)
+        self.fmt = fmt.lower()
+        self.quality = int(quality)
+        if self.fmt not in RENDITION_FORMATS:
+            raise ValueError(f"Unsupported rendition format {fmt!r} (use one of {sorted(RENDITION_FORMATS)})")
+
+    @property
+    def ext(self):
+        return "jpg" if self.fmt == "jpeg" else self.fmt
+
+    def target_size(self, width, height):
+        if self.size <= 0:
+            return width, height
+        scale = self.size / height if self.by_height else self.size / max(width, height)
+        if scale >= 1:
+            return width, height
+        return max(round(width * scale), 1), max(round(height * scale), 1)
+
+
+def parse_renditions(spec):
+    """Parse "thumb:256:webp, poster:720p:jpg:80" (commas or newlines) into Renditions."""
+    renditions = []
+    for entry in spec.replace("\n", ",").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        parts = [p.strip() for p in entry.split(":")]
+        if len(parts) not in (3, 4) or not parts[0]:
+            raise ValueError(f"Invalid rendition {entry!r}; expected name:size:format[:quality]")
+        renditions.append(Rendition(*parts))
+    names = [r.name for r in renditions]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate rendition names in {spec!r}")
+    return renditions
+
+
+def render(source, rendition):
+    """Resize and encode one rendition of a loaded PIL image; return (bytes, mime)."""
+    size = rendition.target_size(*source.size)
+    img = source if size == source.size else source.resize(size, Image.Resampling.LANCZOS)
+    return encode_image(img, rendition.fmt, rendition.quality)
+
+
+def render_all(source, renditions):
+    """Encode every rendition of source in parallel; return {name: (bytes, mime)}."""
+    source.load()
+    with ThreadPoolExecutor(max_workers=min(ENCODE_WORKERS, len(renditions)) or 1) as pool:
+        futures = {r.name: pool.submit(render, source, r) for r in renditions}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def video_frame(path):
+    """Decode the first frame of a video with a single ffmpeg pass."""
+    result = subprocess.run(
+        [FFMPEG_PATH, "-v", "error", "-i", str(path), "-frames:v", "1", "-f", "image2pipe", "-c:v", "png", "-"],
+        capture_output=True,
+        check=True,
+    )
+    if not result.stdout:
+        raise RuntimeError(f"FFmpeg produced no frame for {path}")
+    img = Image.open(io.BytesIO(result.stdout))
+    img.load()
+    return img
+
+
+def rendition_source(path, image=None):
+    """PIL image to render from: the in-memory IMAGE if given, else the uploaded file
+    (an image, or the first frame of a video). None for other file types."""
+    if image is not None:
+        if isinstance(image, (list, tuple)):
+            image = image[0]
+        return tensor_to_pil(image[0] if image.ndim == 4 else image)
+
+    ext = os.path.splitext(str(path))[1].lower()
+    if ext in VIDEO_EXTENSIONS:
+        return video_frame(path)
+    if ext in IMAGE_EXTENSIONS:
+        with Image.open(path) as img:
+            return ImageOps.exif_transpose(img).copy()
+    return None
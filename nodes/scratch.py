@@ -0,0 +1,188 @@
+import atexit
+import os
+import secrets
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: orphaned files are not swept
+    fcntl = None
+
+
+class ScratchSpace:
+    """
+    Shared scratch directory for the temporary files the TFI nodes create.
+
+    - Files live under root (point TFI_SCRATCH_DIR at a fast volume such as
+      /dev/shm). Once the live files there exceed budget_bytes, new files go
+      to overflow_root instead, so a small tmpfs cannot fill up.
+    - Every file is reference counted: mkstemp() returns it with one
+      reference, retain() adds one and release() drops one; the file is
+      deleted as soon as the count reaches zero. temp() wraps this in a
+      context manager so a failing decode or ffmpeg run cannot leak the file.
+    - File names carry an owner id (pid plus a random token). Each owner
+      holds an flock'ed tfi-<owner>.lock file in every scratch directory
+      for its lifetime; when the scratch space is created, the files of
+      owners whose lock can be taken are swept. This stays correct on a
+      root shared across hosts or pid namespaces, and across pid reuse.
+    """
+
+    PREFIX = "tfi-"
+    LOCK_SUFFIX = ".lock"
+
+    def __init__(self, root, budget_bytes=0, overflow_root=None):
+        self.root = os.path.abspath(root)
+        self.budget_bytes = max(int(budget_bytes), 0)
+        self.overflow_root = os.path.abspath(overflow_root or root)
+        self.owner = f"{os.getpid()}x{secrets.token_hex(4)}"
+        self._lock = threading.Lock()
+        self._refs = {}
+        self._owner_locks = []
+
+        for directory in {self.root, self.overflow_root}:
+            os.makedirs(directory, exist_ok=True)
+            self._sweep_orphans(directory)
+            self._hold_owner_lock(directory)
+
+    def mkstemp(self, suffix="", expected_bytes=0):
+        """Create an empty scratch file and return its path (one reference held)."""
+        directory = self.root
+        if self.budget_bytes and self.usage() + max(int(expected_bytes), 0) > self.budget_bytes:
+            directory = self.overflow_root
+
+        fd, path = tempfile.mkstemp(suffix=suffix, prefix=f"{self.PREFIX}{self.owner}-", dir=directory)
+        os.close(fd)
+        with self._lock:
+            self._refs[path] = 1
+        return path
+
+    def retain(self, path):
+        with self._lock:
+            if path not in self._refs:
+                raise KeyError(f"Not a live scratch file: {path}")
+            self._refs[path] += 1
+
+    def release(self, path):
+        """Drop one reference; delete the file when none are left.
+
+        Paths that were not created here are simply deleted.
+        """
+        path = os.fspath(path)
+        with self._lock:
+            count = self._refs.get(path, 1) - 1
+            if count > 0:
+                self._refs[path] = count
+                return
+            self._refs.pop(path, None)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"ScratchSpace: failed to delete {path}: {e}")
+
+    @contextmanager
+    def temp(self, suffix="", expected_bytes=0):
+        path = self.mkstemp(suffix, expected_bytes)
+        try:
+            yield path
+        finally:
+            self.release(path)
+
+    def usage(self):
+        """Bytes currently held by live files on the primary volume."""
+        with self._lock:
+            paths = [p for p in self._refs if os.path.dirname(p) == self.root]
+        total = 0
+        for path in paths:
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                pass
+        return total
+
+    def release_all(self):
+        with self._lock:
+            paths = list(self._refs)
+            self._refs.clear()
+            owner_locks, self._owner_locks = self._owner_locks, []
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        for lock_path, handle in owner_locks:
+            try:
+                os.remove(lock_path)
+            except OSError:
+                pass
+            handle.close()
+
+    def _lock_path(self, directory, owner):
+        return os.path.join(directory, f"{self.PREFIX}{owner}{self.LOCK_SUFFIX}")
+
+    def _hold_owner_lock(self, directory):
+        if fcntl is None:
+            return
+        lock_path = self._lock_path(directory, self.owner)
+        handle = open(lock_path, "a+")
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError as e:
+            handle.close()
+            print(f"ScratchSpace: failed to lock {lock_path}: {e}")
+            return
+        self._owner_locks.append((lock_path, handle))
+
+    def _sweep_orphans(self, directory):
+        """Delete scratch files of owners whose lock file is no longer held."""
+        if fcntl is None:
+            return
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return
+
+        files = {}
+        locks = []
+        for entry in entries:
+            if not entry.name.startswith(self.PREFIX):
+                continue
+            rest = entry.name[len(self.PREFIX):]
+            if "-" not in rest and rest.endswith(self.LOCK_SUFFIX):
+                locks.append(rest[:-len(self.LOCK_SUFFIX)])
+            elif "-" in rest:
+                files.setdefault(rest.split("-", 1)[0], []).append(entry.path)
+
+        # Files without a lock file are left alone; their owner cannot be checked
+        for owner in locks:
+            if owner == self.owner:
+                continue
+            lock_path = self._lock_path(directory, owner)
+            try:
+                handle = open(lock_path, "r")
+            except OSError:
+                continue
+            try:
+                try:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    # Still held: the owner is alive, here or on another host
+                    continue
+                for path in files.get(owner, []) + [lock_path]:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            finally:
+                handle.close()
+
+
+SCRATCH = ScratchSpace(
+    os.getenv("TFI_SCRATCH_DIR", os.path.join(tempfile.gettempdir(), "tfi-scratch")),
+    budget_bytes=int(float(os.getenv("TFI_SCRATCH_BUDGET_MB", "0")) * 1024 * 1024),
+    overflow_root=os.path.join(tempfile.gettempdir(), "tfi-scratch-overflow"),
+)
+atexit.register(SCRATCH.release_all)
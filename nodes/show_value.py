@@ -1,7 +1,103 @@
 import json
+import numpy as np
+import torch
 from comfy.comfy_types.node_typing import IO
 
 
+# Bounds for the summarizing serializer
+MAX_DEPTH = 6
+MAX_ITEMS = 50
+MAX_STRING = 2000
+DEFAULT_MAX_CHARS = 20000
+# Tensors larger than this are summarized from an evenly strided subsample
+STATS_SAMPLE = 1_000_000
+
+
+def _subsample(flat, numel):
+    """Evenly strided view of at most ~STATS_SAMPLE elements (no copy)."""
+    if numel > STATS_SAMPLE:
+        return flat[:: -(-numel // STATS_SAMPLE)], True
+    return flat, False
+
+
+def _stats(flat, sampled):
+    return {
+        "min": float(flat.min()),
+        "max": float(flat.max()),
+        "mean": float(flat.mean()),
+        "sampled": sampled,
+    }
+
+
+def summarize_tensor(t):
+    summary = {
+        "type": "Tensor",
+        "shape": list(t.shape),
+        "dtype": str(t.dtype).replace("torch.", ""),
+        "device": str(t.device),
+    }
+    numel = t.numel()
+    if numel and not t.is_complex():
+        with torch.no_grad():
+            flat, sampled = _subsample(t.detach().reshape(-1), numel)
+            summary.update(_stats(flat.float(), sampled))
+    return summary
+
+
+def summarize_ndarray(a):
+    summary = {"type": "ndarray", "shape": list(a.shape), "dtype": str(a.dtype)}
+    if a.size and (np.issubdtype(a.dtype, np.number) or a.dtype == np.bool_) and not np.iscomplexobj(a):
+        flat, sampled = _subsample(a.reshape(-1), a.size)
+        summary.update(_stats(flat.astype(np.float64, copy=False), sampled))
+    return summary
+
+
+def summarize(v, depth=0):
+    """Reduce v to a bounded, JSON-serializable structure.
+
+    Tensors and arrays become shape/dtype/stat summaries; containers are cut
+    at MAX_ITEMS entries and MAX_DEPTH levels and long strings at MAX_STRING
+    characters, each with an explicit "…" marker.
+    """
+    if v is None or isinstance(v, (bool, int, float)):
+        return v
+    if isinstance(v, str):
+        if len(v) > MAX_STRING:
+            return v[:MAX_STRING] + f"… (+{len(v) - MAX_STRING} chars)"
+        return v
+    if isinstance(v, torch.Tensor):
+        return summarize_tensor(v)
+    if isinstance(v, np.ndarray):
+        return summarize_ndarray(v)
+    if isinstance(v, np.generic):
+        return v.item()
+
+    if isinstance(v, (dict, list, tuple, set, frozenset)):
+        if depth >= MAX_DEPTH:
+            return f"<{type(v).__name__} with {len(v)} item(s), depth limit>"
+        if isinstance(v, dict):
+            out = {}
+            for i, (key, item) in enumerate(v.items()):
+                if i >= MAX_ITEMS:
+                    out["…"] = f"+{len(v) - MAX_ITEMS} more key(s)"
+                    break
+                out[str(key)] = summarize(item, depth + 1)
+            return out
+        out = []
+        for i, item in enumerate(v):
+            if i >= MAX_ITEMS:
+                out.append(f"… +{len(v) - MAX_ITEMS} more item(s)")
+                break
+            out.append(summarize(item, depth + 1))
+        return out
+
+    try:
+        text = str(v)
+    except Exception:
+        return "<unserializable>"
+    return summarize(text, depth)
+
+
 class ShowValue:
     @classmethod
     def INPUT_TYPES(cls):
@@ -10,6 +106,10 @@ class ShowValue:
                 "value": (IO.ANY, {}),
                 "value_name": (IO.STRING, {"default": "Value", "multiline": False, "dynamicPrompts": False}),
             },
+            "optional": {
+                "print_to_console": ("BOOLEAN", {"default": True}),
+                "max_chars": ("INT", {"default": DEFAULT_MAX_CHARS, "min": 100, "max": 1_000_000}),
+            },
         }
 
     RETURN_TYPES = ()
@@ -19,18 +119,19 @@ class ShowValue:
     CATEGORY = "TFI/utils"
     SEARCH_ALIASES = ["show value", "display value"]
 
-    def _to_display_string(self, v):
+    def _to_display_string(self, v, max_chars=DEFAULT_MAX_CHARS):
         try:
-            # Try JSON serialization for readable dict/list structures
-            return json.dumps(v, ensure_ascii=False, indent=2)
+            # Summarize first so tensors, AUDIO dicts and long lists stay small
+            text = json.dumps(summarize(v), ensure_ascii=False, indent=2)
         except Exception:
-            try:
-                return str(v)
-            except Exception:
-                return "<unserializable>"
-
-    def main(self, value=None, value_name="Value"):
-        display_str = self._to_display_string(value)
-        print(f"ShowValue: {value_name}: {display_str}")
+            text = "<unserializable>"
+        if len(text) > max_chars:
+            text = text[:max_chars] + f"\n… (truncated, {len(text) - max_chars} more chars)"
+        return text
+
+    def main(self, value=None, value_name="Value", print_to_console=True, max_chars=DEFAULT_MAX_CHARS):
+        display_str = self._to_display_string(value, max_chars)
+        if print_to_console:
+            print(f"ShowValue: {value_name}: {display_str}")
         # The UI preview convention mirrors ShowUrl but with a different key
         return {"ui": {"show_value": (value_name, display_str,)}}
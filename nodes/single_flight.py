@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+import time
+
+from .util import INTERRUPT_CHECK_INTERVAL, throw_if_interrupted
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process deduplication is available
+    fcntl = None
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapse identical concurrent calls into one.
+
+    The first caller for a key runs fn(); callers arriving while it is in
+    flight wait and receive the same result (or exception). With lock_dir set,
+    the leader additionally holds an flock on <lock_dir>/<key>.lock so that
+    other processes on the host wait for it and pick up the JSON result it
+    leaves in <key>.json instead of running fn() themselves. Results must be
+    JSON-serialisable for the cross-process variant.
+    """
+
+    RESULT_TTL_S = 600
+
+    def __init__(self, lock_dir=None):
+        self.lock_dir = lock_dir or None
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            while not call.event.wait(INTERRUPT_CHECK_INTERVAL):
+                throw_if_interrupted()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run_leader(key, fn)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def _run_leader(self, key, fn):
+        if not self.lock_dir or fcntl is None:
+            return fn()
+
+        os.makedirs(self.lock_dir, exist_ok=True)
+        lock_path = os.path.join(self.lock_dir, f"{key}.lock")
+        result_path = os.path.join(self.lock_dir, f"{key}.json")
+
+        with open(lock_path, "a+") as lock_file:
+            waited_since = None
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Another process is running the same call; wait for it to finish
+                waited_since = time.time()
+                while True:
+                    throw_if_interrupted()
+                    try:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        time.sleep(INTERRUPT_CHECK_INTERVAL)
+
+            try:
+                if waited_since is not None:
+                    result = self._read_result(result_path, waited_since)
+                    if result is not None:
+                        return result[0]
+
+                result = fn()
+                self._write_result(result_path, result)
+                return result
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                self._prune()
+
+    def _read_result(self, path, not_before):
+        """Return (result,) if the other process finished while we waited, else None."""
+        try:
+            if os.path.getmtime(path) < not_before:
+                return None
+            with open(path, encoding="utf-8") as f:
+                return (json.load(f),)
+        except (OSError, ValueError):
+            return None
+
+    def _write_result(self, path, result):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(result, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"SingleFlight: could not share result via {path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _prune(self):
+        cutoff = time.time() - self.RESULT_TTL_S
+        try:
+            for entry in os.scandir(self.lock_dir):
+                if entry.name.endswith(".json") and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+        except OSError:
+            pass
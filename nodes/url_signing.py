@@ -0,0 +1,125 @@
+import base64
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import quote, urlparse
+
+
+DEFAULT_EXPIRY_S = int(float(os.getenv("BUNNY_URL_EXPIRY_HOURS", "24")) * 3600)
+# Expiry times are rounded up to this step so repeated signing yields identical, cacheable URLs
+EXPIRY_STEP_S = max(int(os.getenv("TFI_SIGN_EXPIRY_STEP_S", "300")), 1)
+CACHE_SIZE = int(os.getenv("TFI_SIGN_CACHE_SIZE", "4096"))
+
+
+def expires_at(expires_in):
+    """Unix expiry expires_in seconds from now, rounded up to EXPIRY_STEP_S."""
+    return -(-(int(time.time()) + int(expires_in)) // EXPIRY_STEP_S) * EXPIRY_STEP_S
+
+
+def _b64url(digest):
+    return base64.b64encode(digest).decode("utf-8").replace("+", "-").replace("/", "_").replace("=", "")
+
+
+class URLSigner:
+    """
+    Bunny CDN token authentication for the files under base_cdn_url.
+
+    sign() produces a per-file URL. With token_path the (SHA-256) token
+    covers every file under that directory, so sign_many() computes one
+    token for a whole folder. Expiry times are rounded up to EXPIRY_STEP_S
+    and tokens are cached by (path, token_path, expires), so hot paths are
+    only hashed once per step; a cached URL is never older than its
+    expires_in asks for.
+    """
+
+    def __init__(self, token_key, base_cdn_url, default_expiry_s=DEFAULT_EXPIRY_S, cache_size=CACHE_SIZE):
+        self.token_key = token_key
+        self.base_cdn_url = base_cdn_url.rstrip("/") + "/"
+        # Tokens sign the full URL path, e.g. /ai-talking-videos/<path>
+        self.path_prefix = urlparse(self.base_cdn_url).path
+        self.default_expiry_s = default_expiry_s
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def expires_at(self, expires_in=None):
+        return expires_at(self.default_expiry_s if expires_in is None else expires_in)
+
+    def _token(self, signed_path, expires, token_path=None):
+        """Token for signed_path: the file itself, or the token_path directory."""
+        if token_path is None:
+            # Basic token: MD5 over key + path + expires
+            base = self.token_key + signed_path + str(expires)
+            return _b64url(hashlib.md5(base.encode("utf-8")).digest())
+        # Advanced token: SHA-256, with token_path among the signed parameters
+        base = self.token_key + signed_path + str(expires) + "token_path=" + token_path
+        return _b64url(hashlib.sha256(base.encode("utf-8")).digest())
+
+    def _cached_token(self, signed_path, expires, token_path):
+        key = (signed_path, expires, token_path)
+        with self._lock:
+            token = self._cache.get(key)
+            if token is not None:
+                self._cache.move_to_end(key)
+                return token
+
+        token = self._token(signed_path, expires, token_path)
+
+        with self._lock:
+            self._cache[key] = token
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return token
+
+    def _full_path(self, path):
+        return self.path_prefix + path.lstrip("/")
+
+    def _directory_path(self, token_path):
+        full = self._full_path(token_path)
+        return full if full.endswith("/") else full + "/"
+
+    def sign(self, path, expires_in=None, token_path=None):
+        """Signed URL for path (relative to base_cdn_url).
+
+        token_path (also relative) signs the directory instead of the file;
+        path must lie under it.
+        """
+        return self._sign(path, self.expires_at(expires_in), token_path)
+
+    def sign_many(self, paths, expires_in=None, token_path=None):
+        """Sign a list of paths with one expiry; returns the URLs in order.
+
+        With token_path all of them share a single directory token.
+        """
+        expires = self.expires_at(expires_in)
+        return [self._sign(path, expires, token_path) for path in paths]
+
+    def _sign(self, path, expires, token_path):
+        path = path.lstrip("/")
+        url = self.base_cdn_url + path
+
+        if token_path is None:
+            token = self._cached_token(self._full_path(path), expires, None)
+            return f"{url}?token={token}&expires={expires}"
+
+        directory = self._directory_path(token_path)
+        if not self._full_path(path).startswith(directory):
+            raise ValueError(f"{path!r} is not under token_path {token_path!r}")
+        token = self._cached_token(directory, expires, directory)
+        return f"{url}?token={token}&token_path={quote(directory, safe='')}&expires={expires}"
+
+
+_signers = {}
+_signers_lock = threading.Lock()
+
+
+def get_signer(token_key, base_cdn_url):
+    """Process-wide URLSigner per (token key, CDN base), so its cache outlives connectors."""
+    key = (token_key, base_cdn_url)
+    with _signers_lock:
+        signer = _signers.get(key)
+        if signer is None:
+            signer = _signers[key] = URLSigner(token_key, base_cdn_url)
+        return signer
@@ -2,13 +2,67 @@ import base64
 import io
 import json
 import os
+import threading
 import time
+from contextlib import contextmanager
 
 import numpy as np
-import requests
 import torch
 from PIL import Image
 
+try:
+    import comfy.model_management as model_management
+except ImportError:  # running outside ComfyUI
+    model_management = None
+
+
+# Interruption (cancel button) support for long waits and downloads
+INTERRUPT_CHECK_INTERVAL = 0.25
+
+
+_interrupts = threading.local()
+
+
+def throw_if_interrupted():
+    """Raise ComfyUI's InterruptProcessingException if the user cancelled the prompt."""
+    if model_management is not None and not interrupts_ignored():
+        model_management.throw_exception_if_processing_interrupted()
+
+
+def interrupts_ignored():
+    return getattr(_interrupts, "ignored", False)
+
+
+@contextmanager
+def ignore_interrupts(ignored=True):
+    """Skip interrupt checks on this thread.
+
+    ComfyUI clears the interrupt flag when it raises, so background threads
+    (prefetching) must not check it or they would swallow a cancel meant
+    for the running prompt.
+    """
+    previous = interrupts_ignored()
+    _interrupts.ignored = ignored
+    try:
+        yield
+    finally:
+        _interrupts.ignored = previous
+
+
+def is_interrupt(exc):
+    return model_management is not None and isinstance(exc, model_management.InterruptProcessingException)
+
+
+def interruptible_sleep(seconds):
+    """time.sleep that wakes up regularly to honour an interrupted prompt."""
+    deadline = time.time() + max(seconds, 0.0)
+    while True:
+        throw_if_interrupted()
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return
+        time.sleep(min(remaining, INTERRUPT_CHECK_INTERVAL))
+
 
 # Tensor to PIL
 def tensor_to_pil(image):
@@ -20,7 +74,14 @@ def pil_to_tensor(image):
     return torch.from_numpy(np.array(image).astype(np.float32) / 255.0).unsqueeze(0)
 
 
-def base64_to_image(base64_string):
+def pil_to_tensor_into(image, out):
+    """Decode an RGB PIL image straight into a preallocated float32 [H, W, 3] tensor."""
+    out.copy_(torch.from_numpy(np.array(image, dtype=np.uint8)))
+    out.mul_(1.0 / 255.0)
+    return out
+
+
+def base64_to_image(base64_string, return_bytes=False):
     # 去除前缀
     base64_list = base64_string.split(",", 1)
     if len(base64_list) == 2:
@@ -37,6 +98,8 @@ def base64_to_image(base64_string):
     # 使用PIL的Image模块打开图像数据
     image = Image.open(image_stream)
 
+    if return_bytes:
+        return image, image_data
     return image
 
 
@@ -56,27 +119,56 @@ def image_to_base64(pli_image, pnginfo=None):
     return encoded_image
 
 
-def read_image_from_url(image_url):
+IMAGE_ENCODINGS = {
+    "png": ("PNG", "image/png"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "jpg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+}
+
+
+def encode_image(pil_image, fmt="png", quality=90):
+    """Encode a PIL image once and return (encoded_bytes, mime_type)."""
+    pil_format, mime = IMAGE_ENCODINGS.get((fmt or "png").strip().lower(), IMAGE_ENCODINGS["png"])
+
+    image_data = io.BytesIO()
+    if pil_format == "PNG":
+        pil_image.save(image_data, format=pil_format)
+    else:
+        if pil_format == "JPEG" and pil_image.mode not in ("RGB", "L"):
+            pil_image = pil_image.convert("RGB")
+        pil_image.save(image_data, format=pil_format, quality=int(quality))
+
+    return image_data.getvalue(), mime
+
+
+def bytes_to_data_url(data, mime="image/png"):
+    return f"data:{mime};base64," + base64.b64encode(data).decode('utf-8')
+
+
+def read_image_from_url(image_url, return_bytes=False):
     try:
-        # Create a new session and disable keep-alive if desired
-        session = requests.Session()
-        session.keep_alive = False
+        # Imported here: http_transport itself depends on this module
+        from .http_transport import HTTP_TRANSPORT
 
-        # Get the image content from the URL
-        response = session.get(image_url, stream=True, verify=False)
+        # Get the image content from the URL (pooled connection, TLS verified)
+        response = HTTP_TRANSPORT.get(image_url)
         response.raise_for_status()  # Ensure we got a valid response
 
         # Convert the response content into a BytesIO object
-        image_bytes = io.BytesIO(response.content)
+        content = response.content
+        image_bytes = io.BytesIO(content)
         
         # Open the image using PIL and force loading the image data
         img = Image.open(image_bytes)
         img.load()  # Ensure the image is fully loaded
         
+        if return_bytes:
+            return img, content
         return img
     except Exception as e:
         print(f"Error reading image from URL {image_url}: {e}")
-        return None
+        return (None, None) if return_bytes else None
 
 
 def hex_to_rgba(hex_color):